@@ -4,15 +4,16 @@ Reusable utility functions for extracting data from Excel workbooks.
 This module now contains both:
  - Low-level extract_data implementation (migrated from src/extract.py)
  - Higher-level helpers (strategy registry, multi-sheet extraction, CSV saving)
- - Workbook handling utilities (opening, backup creation)
 """
 
+import csv
 import os
 import logging
-from datetime import datetime
 from typing import Dict, List, Any, Union, Tuple
 from openpyxl import load_workbook
 
+logger = logging.getLogger(__name__)
+
 
 # Strategy Registry for callable functions
 STRATEGY_REGISTRY = {
@@ -49,14 +50,34 @@ def _find_cell_by_text(sheet, search_texts: List[str]):
     return None
 
 
-def _get_real_cell_value(sheet, row: int, col: int):
-    """Return cell value, following merged ranges to the top-left cell when applicable."""
-    cell = sheet.cell(row, col)
+def _merged_anchor_map(sheet) -> Dict[Tuple[int, int], Tuple[int, int]]:
+    """Map every (row, col) covered by a merged range to the range's top-left (row, col)."""
+    anchors: Dict[Tuple[int, int], Tuple[int, int]] = {}
     for merged_range in sheet.merged_cells.ranges:
-        if (merged_range.min_row <= row <= merged_range.max_row and
-            merged_range.min_col <= col <= merged_range.max_col):
-            return sheet.cell(merged_range.min_row, merged_range.min_col).value
-    return cell.value
+        anchor = (merged_range.min_row, merged_range.min_col)
+        for row in range(merged_range.min_row, merged_range.max_row + 1):
+            for col in range(merged_range.min_col, merged_range.max_col + 1):
+                anchors.setdefault((row, col), anchor)
+    return anchors
+
+
+def _get_real_cell_value(sheet, row: int, col: int, anchors: Dict[Tuple[int, int], Tuple[int, int]] | None = None):
+    """Return cell value, following merged ranges to the top-left cell when applicable.
+
+    Pass a precomputed ``_merged_anchor_map(sheet)`` as ``anchors`` when reading many
+    cells from the same sheet to avoid scanning every merged range per cell; without
+    it the ranges are scanned directly, which is cheaper for a single lookup.
+    """
+    if anchors is None:
+        for merged_range in sheet.merged_cells.ranges:
+            if (merged_range.min_row <= row <= merged_range.max_row and
+                merged_range.min_col <= col <= merged_range.max_col):
+                return sheet.cell(merged_range.min_row, merged_range.min_col).value
+        return sheet.cell(row, col).value
+    anchor = anchors.get((row, col))
+    if anchor is not None:
+        row, col = anchor
+    return sheet.cell(row, col).value
 
 
 def extract_data(
@@ -67,14 +88,20 @@ def extract_data(
     header_row_offset: int = 1,
     stop_condition: callable = None,
     sheet_name: str = None,
+    workbook=None,
 ) -> List[List[Any]]:
-    """Extract values from selected columns of an Excel sheet with optional header/start/stop logic."""
-    wb = load_workbook(file_path, data_only=True)
+    """Extract values from selected columns of an Excel sheet with optional header/start/stop logic.
+
+    Pass an already loaded ``workbook`` (data_only, not read-only) to extract several
+    sheets from one parse; it is left open for the caller.
+    """
+    wb = workbook if workbook is not None else load_workbook(file_path, data_only=True, keep_links=False)
     if sheet_name:
         try:
             sheet = wb[sheet_name]
         except KeyError:
-            wb.close()
+            if workbook is None:
+                wb.close()
             raise ValueError(f"Sheet '{sheet_name}' not found in {file_path}. Available sheets: {list(wb.sheetnames)}")
     else:
         sheet = wb.active
@@ -95,31 +122,46 @@ def extract_data(
     # Determine start row
     start_row = start_row_strategy(header_row) if start_row_strategy else (header_row + header_row_offset)
 
+    # Resolve merged ranges once per sheet instead of once per cell
+    anchors = _merged_anchor_map(sheet)
+
+    # Read each row's values in one pass; cells hidden under a merge come back
+    # as None there and are resolved through their range's top-left cell
+    flat_indices = [c for idx in column_indices for c in (idx if isinstance(idx, list) else [idx])
+                    if isinstance(c, int)]
+    max_col = starting_col - 1 + max(flat_indices, default=1)
+
+    def cell_value(row_values, row, col):
+        anchor = anchors.get((row, col))
+        if anchor is not None and anchor != (row, col):
+            return sheet.cell(*anchor).value
+        return row_values[col - 1]
+
     # Row extraction loop
     data: List[List[Any]] = []
-    row = start_row
-    while row <= sheet.max_row:
+    rows = sheet.iter_rows(min_row=start_row, max_row=sheet.max_row, max_col=max_col, values_only=True)
+    for row, row_values in enumerate(rows, start=start_row):
         row_data: List[Any] = []
         for col_idx in column_indices:
             if isinstance(col_idx, int):
                 actual_col = starting_col + (col_idx - 1)
-                value = _get_real_cell_value(sheet, row, actual_col)
+                value = cell_value(row_values, row, actual_col)
             elif isinstance(col_idx, list):
                 value = None
                 dovolenka_found = False
                 for inner_col_idx in col_idx:
                     actual_inner_col = starting_col + (inner_col_idx - 1)
-                    cell_value = _get_real_cell_value(sheet, row, actual_inner_col)
-                    if cell_value is not None and "Dovolenka" in str(cell_value):
-                        value = cell_value
+                    inner_value = cell_value(row_values, row, actual_inner_col)
+                    if inner_value is not None and "Dovolenka" in str(inner_value):
+                        value = inner_value
                         dovolenka_found = True
                         break
                 if not dovolenka_found:
                     for inner_col_idx in col_idx:
                         actual_inner_col = starting_col + (inner_col_idx - 1)
-                        cell_value = _get_real_cell_value(sheet, row, actual_inner_col)
-                        if cell_value is not None and str(cell_value).strip():
-                            value = cell_value
+                        inner_value = cell_value(row_values, row, actual_inner_col)
+                        if inner_value is not None and str(inner_value).strip():
+                            value = inner_value
                             break
             else:
                 value = None
@@ -134,9 +176,9 @@ def extract_data(
             data.append(row_data)
         else:
             break
-        row += 1
 
-    wb.close()
+    if workbook is None:
+        wb.close()
     return data
 
 
@@ -162,8 +204,10 @@ def extract_from_workbook(config: Dict[str, Any]) -> Dict[str, List[List[Any]]]:
     """
     results = {}
 
-    # Load the workbook to get sheet names
-    wb = load_workbook(config['file_path'], read_only=True)
+    # Parse the workbook once; every sheet is extracted from this instance.
+    # Not read_only: merged ranges are needed to resolve hidden cells. Cached
+    # external-link data is never read, so it is not loaded either.
+    wb = load_workbook(config['file_path'], data_only=True, keep_links=False)
 
     # Determine which sheets to process
     sheets_to_process = []
@@ -214,7 +258,8 @@ def extract_from_workbook(config: Dict[str, Any]) -> Dict[str, List[List[Any]]]:
         extract_args = {
             'file_path': config['file_path'],
             'column_indices': merged_config['column_indices'],
-            'sheet_name': sheet_name
+            'sheet_name': sheet_name,
+            'workbook': wb,
         }
 
         # Add optional parameters if provided
@@ -232,10 +277,10 @@ def extract_from_workbook(config: Dict[str, Any]) -> Dict[str, List[List[Any]]]:
             data = extract_data(**extract_args)
             results[sheet_name] = data
         except Exception as e:
-            logging.error(f"Failed to extract data from sheet '{sheet_name}': {e}")
+            logger.error("Failed to extract data from sheet %r: %s", sheet_name, e)
             results[sheet_name] = []
 
-    wb.close()  # Close the readonly workbook
+    wb.close()
     return results
 
 
@@ -267,9 +312,6 @@ def save_extraction_results(results: Dict[str, List[List[Any]]], config: Dict[st
         results: Dictionary of sheet names to extracted data
         config: Configuration dictionary containing 'output_prefix' for naming
     """
-    import csv
-    import os
-
     output_prefix = config.get('output_prefix', 'extracted_data')
     headers = config.get('headers', [])
 
@@ -287,33 +329,3 @@ def save_extraction_results(results: Dict[str, List[List[Any]]], config: Dict[st
             if headers:
                 writer.writerow(headers)
             writer.writerows(data)
-
-
-def open_workbooks(source_excel: str, target_excel: str, backup_dir: str, dry_run: bool) -> Tuple[Any, Any, str | None]:
-    """Open source (read-only) and target (write) workbooks.
-
-    Creates timestamped backup of target (unless dry_run) under backup_dir.
-
-    Returns (source_wb, target_wb, backup_path)
-    """
-    if not os.path.exists(source_excel):
-        raise SystemExit(f"Source workbook not found: {source_excel}")
-    if not os.path.exists(target_excel):
-        raise SystemExit(f"Target workbook not found: {target_excel}")
-
-    source_wb = load_workbook(source_excel, read_only=True, data_only=True)
-    target_wb = load_workbook(target_excel)
-    backup_path = None
-
-    if not dry_run:
-        os.makedirs(backup_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"backup_{timestamp}.xlsx"
-        backup_path = os.path.join(backup_dir, backup_filename)
-        # Simple copy by saving a duplicate workbook object
-        target_wb.save(backup_path)
-        logging.info(f"Created backup of target workbook: {backup_path}")
-    else:
-        logging.info("Dry-run: skipping target backup creation")
-
-    return source_wb, target_wb, backup_path
\ No newline at end of file
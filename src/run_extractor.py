@@ -18,6 +18,9 @@ except ImportError:
     print("Error: PyYAML library not found. Install with 'pip install pyyaml'")
     sys.exit(1)
 
+# Prefer the LibYAML-backed loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 from src.extractor_utils import extract_from_workbook, save_extraction_results
 
 
@@ -54,7 +57,7 @@ Examples:
 
     try:
         with open(args.config, 'r', encoding='utf-8') as f:
-            all_configs = yaml.safe_load(f)
+            all_configs = yaml.load(f, Loader=YAML_LOADER)
     except Exception as e:
         print(f"Error loading configuration file: {e}")
         sys.exit(1)
@@ -79,10 +82,9 @@ Examples:
         save_extraction_results(results, config)
 
         # Report results
-        print("Extraction completed successfully!")
-        print(f"Processed {len(results)} sheet(s):")
-        for sheet_name, data in results.items():
-            print(f"  - {sheet_name}: {len(data)} records")
+        lines = ["Extraction completed successfully!", f"Processed {len(results)} sheet(s):"]
+        lines.extend(f"  - {sheet_name}: {len(data)} records" for sheet_name, data in results.items())
+        sys.stdout.write("\n".join(lines) + "\n")
 
     except Exception as e:
         print(f"Error during extraction: {e}")
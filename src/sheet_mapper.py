@@ -3,14 +3,25 @@ import difflib
 import unicodedata
 import argparse
 import json
+import logging
 import os
-from datetime import date
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+from datetime import date, datetime
 
 source_path = '/home/gobi/vykazy/data/input/source_test.xlsx'
 target_path = '/home/gobi/vykazy/data/output/updated_20250913_193959.xlsx'
 # Central list of instruction sheet names to exclude in mappings
 INSTRUCTION_SHEET_NAMES = {"Inštrukcie k vyplneniu PV", "Instrukcie k vyplneniu PV"}
 
+logger = logging.getLogger(__name__)
+
+SPREADSHEETML_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+PACKAGE_RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+OFFICE_RELS_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+OFFICE_DOCUMENT_REL_TYPE = OFFICE_RELS_NS + '/officeDocument'
+
 MAPPINGS_JSON_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'mappings.json')
 
 
@@ -50,17 +61,66 @@ def filter_protected_from_unmatched(unmatched_target, protected_sheets):
             contractors.append(name)
     return contractors, protected
 
+def _archive_sheet_names(archive):
+    """Return sheet names from an open xlsx archive, in workbook order.
+
+    The workbook part is found through the package's officeDocument
+    relationship. The list matches openpyxl's ``sheetnames``: chartsheets are
+    included and sheets whose part is missing are skipped. Raises KeyError
+    when a part or relationship is missing.
+    """
+    package_rels = ElementTree.fromstring(archive.read('_rels/.rels'))
+    workbook_part = next(
+        (rel.get('Target').lstrip('/') for rel in package_rels.iter(f'{{{PACKAGE_RELS_NS}}}Relationship')
+         if rel.get('Type') == OFFICE_DOCUMENT_REL_TYPE),
+        None,
+    )
+    if workbook_part is None:
+        raise KeyError('officeDocument relationship')
+    workbook_dir, workbook_file = posixpath.split(workbook_part)
+    workbook_rels = ElementTree.fromstring(
+        archive.read(posixpath.join(workbook_dir, '_rels', workbook_file + '.rels')))
+
+    # Relationship id -> part path inside the archive
+    sheet_parts = {}
+    for rel in workbook_rels.iter(f'{{{PACKAGE_RELS_NS}}}Relationship'):
+        target = rel.get('Target', '')
+        part = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(workbook_dir, target))
+        sheet_parts[rel.get('Id')] = part
+
+    archive_parts = set(archive.namelist())
+    root = ElementTree.fromstring(archive.read(workbook_part))
+    names = []
+    for sheet in root.iter(f'{{{SPREADSHEETML_NS}}}sheet'):
+        if sheet_parts[sheet.get(f'{{{OFFICE_RELS_NS}}}id')] in archive_parts:
+            names.append(sheet.get('name'))
+    return names
+
+
 def extract_sheet_names(path):
+    """Return sheet names in workbook order, as openpyxl's ``sheetnames`` lists them.
+
+    Reads only the package and workbook parts of the xlsx archive, so no cell
+    data or styles are parsed. Falls back to a read-only openpyxl load when
+    those parts cannot be resolved or parsed.
+    """
     try:
-        wb = openpyxl.load_workbook(path)
-        sheets = wb.sheetnames
-        wb.close()
-        return sheets
+        with zipfile.ZipFile(path) as archive:
+            return _archive_sheet_names(archive)
     except FileNotFoundError:
-        print(f"File not found: {path}")
+        logger.error("File not found: %s", path)
         return []
+    except (KeyError, ElementTree.ParseError, zipfile.BadZipFile, OSError) as e:
+        logger.debug("Could not read sheet names from the archive of %s (%s); loading it", path, e)
+
+    try:
+        wb = openpyxl.load_workbook(path, read_only=True)
+        try:
+            return wb.sheetnames
+        finally:
+            wb.close()
     except Exception as e:
-        print(f"Error loading {path}: {e}")
+        logger.error("Error loading %s: %s", path, e)
         return []
 
 def filter_instruction_sheets(sheet_names):
@@ -87,16 +147,20 @@ def create_mapping(source_sheets, target_sheets):
     mapping = {}
     unmatched_source = []
     norm_targets = [_normalize_name(t) for t in target_sheets]
+    # Normalized name -> first target sheet with that name (same pick as list.index)
+    target_by_norm = {}
+    for norm, target in zip(norm_targets, target_sheets):
+        target_by_norm.setdefault(norm, target)
     used_targets = set()
     for source in source_sheets:
         norm_source = _normalize_name(source)
-        if norm_source in norm_targets:
-            matched = target_sheets[norm_targets.index(norm_source)]
+        if norm_source in target_by_norm:
+            matched = target_by_norm[norm_source]
             used_targets.add(matched)
         else:
             close = difflib.get_close_matches(norm_source, norm_targets, n=1, cutoff=0.8)
             if close:
-                matched = target_sheets[norm_targets.index(close[0])]
+                matched = target_by_norm[close[0]]
                 used_targets.add(matched)
             else:
                 matched = '-'
@@ -132,6 +196,37 @@ def remove_unmatched_target_sheets(target_path, unmatched_target):
     wb.close()
     return cleaned_path
 
+def order_workbook_sheets(workbook, source_sheets, mapping):
+    """Reorder an open workbook's sheets in place to follow the source sheet order.
+
+    Sheets mapped from ``source_sheets`` come first, in source order; all other
+    sheets keep their relative order after them.
+    """
+    target_sheets = workbook.sheetnames
+
+    # Create ordered list of target sheets based on source order
+    ordered_target_sheets = []
+    unordered_sheets = list(target_sheets)  # Copy to track remaining sheets
+
+    # First, add sheets in source order (if they exist in target)
+    for source_sheet in source_sheets:
+        target_sheet = mapping.get(source_sheet, '-')
+        if target_sheet != '-' and target_sheet in unordered_sheets:
+            ordered_target_sheets.append(target_sheet)
+            unordered_sheets.remove(target_sheet)
+
+    # Add any remaining target sheets that weren't mapped
+    ordered_target_sheets.extend(unordered_sheets)
+
+    # Reorder sheets in target workbook
+    # OpenPyxl doesn't have direct sheet reordering, so we need to move sheets
+    for i, sheet_name in enumerate(ordered_target_sheets):
+        if sheet_name in workbook.sheetnames:
+            sheet = workbook[sheet_name]
+            # Move sheet to the correct position
+            workbook.move_sheet(sheet, offset=i - workbook.index(sheet))
+
+
 def sort_target_sheets_by_source_order(source_path, target_path, mapping=None, save_sorted=True):
     """Sort sheets in target workbook based on the order of sheets in source workbook.
     
@@ -146,59 +241,36 @@ def sort_target_sheets_by_source_order(source_path, target_path, mapping=None, s
         str: Path to the sorted workbook file if save_sorted=True, else None
     """
     try:
-        # Load both workbooks
-        source_wb = openpyxl.load_workbook(source_path)
+        # Only the source's sheet order is needed, so read just its names;
+        # the target is loaded fully because it is reordered and saved
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(source_path)
+        source_sheets = filter_instruction_sheets(extract_sheet_names(source_path))
         target_wb = openpyxl.load_workbook(target_path)
         
-        # Get sheet names from source (filtered)
-        source_sheets = filter_instruction_sheets(source_wb.sheetnames)
-        target_sheets = target_wb.sheetnames
-        
         # Create mapping if not provided
         if mapping is None:
-            mapping, _, _ = create_mapping(source_sheets, target_sheets)
-        
-        # Create ordered list of target sheets based on source order
-        ordered_target_sheets = []
-        unordered_sheets = list(target_sheets)  # Copy to track remaining sheets
-        
-        # First, add sheets in source order (if they exist in target)
-        for source_sheet in source_sheets:
-            target_sheet = mapping.get(source_sheet, '-')
-            if target_sheet != '-' and target_sheet in unordered_sheets:
-                ordered_target_sheets.append(target_sheet)
-                unordered_sheets.remove(target_sheet)
-        
-        # Add any remaining target sheets that weren't mapped
-        ordered_target_sheets.extend(unordered_sheets)
-        
-        # Reorder sheets in target workbook
-        # OpenPyxl doesn't have direct sheet reordering, so we need to move sheets
-        for i, sheet_name in enumerate(ordered_target_sheets):
-            if sheet_name in target_wb.sheetnames:
-                sheet = target_wb[sheet_name]
-                # Move sheet to the correct position
-                target_wb.move_sheet(sheet, offset=i - target_wb.index(sheet))
-        
-        source_wb.close()
-        
+            mapping, _, _ = create_mapping(source_sheets, target_wb.sheetnames)
+
+        order_workbook_sheets(target_wb, source_sheets, mapping)
+
         if save_sorted:
             # Save sorted workbook
             base, ext = os.path.splitext(target_path)
             sorted_path = base + '_sorted' + ext
             target_wb.save(sorted_path)
             target_wb.close()
-            print(f"Sorted target workbook saved to: {sorted_path}")
+            logger.info("Sorted target workbook saved to: %s", sorted_path)
             return sorted_path
         else:
             target_wb.close()
             return None
             
     except FileNotFoundError as e:
-        print(f"File not found: {e}")
+        logger.error("File not found: %s", e)
         return None
     except Exception as e:
-        print(f"Error sorting sheets: {e}")
+        logger.error("Error sorting sheets: %s", e)
         return None
 
 def save_mapping_json(mapping, unmatched_source, unmatched_target, output_dir, user_path, activities=None, metadata=None):
@@ -215,8 +287,6 @@ def save_mapping_json(mapping, unmatched_source, unmatched_target, output_dir, u
 
     Returns path to saved JSON file.
     """
-    from datetime import datetime
-    
     os.makedirs(output_dir, exist_ok=True)
     if isinstance(user_path, str) and user_path not in ("True", "true", "FALSE", "False"):
         out_path = user_path
@@ -238,11 +308,12 @@ def save_mapping_json(mapping, unmatched_source, unmatched_target, output_dir, u
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
     
-    print(f"Runtime mapping JSON saved: {out_path}")
+    logger.info("Runtime mapping JSON saved: %s", out_path)
     return out_path
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     parser = argparse.ArgumentParser(description='Map sheet names from source to target Excel files.')
     parser.add_argument('--source', default=source_path, help='Path to source Excel file')
     parser.add_argument('--target', default=target_path, help='Path to target Excel file')
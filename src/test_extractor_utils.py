@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from src import extractor_utils
+from src.extractor_utils import STRATEGY_REGISTRY, extract_data, extract_from_workbook
+
+# Merged cells read through their range's top-left cell; these fixtures pin the
+# extracted values for vertical, horizontal and two-way merges in both layouts.
+
+WORK_VALUES = ('08:00', '16:30', 30, None, None, '08:00:00')
+
+
+def _make_workbook(path: str):
+    wb = Workbook()
+    src = wb.active
+    src.title = 'Source'
+    src['B4'] = 'Dátum'
+    for day in range(1, 7):
+        row = day + 5
+        src.cell(row=row, column=2, value=datetime(2025, 7, day))
+        for col, value in enumerate(WORK_VALUES, start=3):
+            src.cell(row=row, column=col, value=value)
+    src.merge_cells('C6:C7')    # vertical: one arrival time over two days
+    src['C8'] = 'Dovolenka'
+    src.merge_cells('C8:H8')    # horizontal: vacation across the row
+    src['E9'] = 45
+    src.merge_cells('E9:F10')   # both directions
+
+    tgt = wb.create_sheet('Target')
+    for row in range(26, 31):
+        for col in range(1, 15):
+            tgt.cell(row=row, column=col, value=f"{row}:{col}")
+    tgt['E26'] = 'Popis'
+    tgt.merge_cells('E26:H26')
+    tgt.merge_cells('B27:B28')
+    for col in 'EFH':
+        tgt[f'{col}29'] = None
+    tgt['G29'] = 'Dovolenka'
+    tgt.merge_cells('I29:J30')
+    tgt['E31'] = 'Spolu:'
+    wb.save(path)
+    wb.close()
+
+
+def _day(day, *values):
+    return [datetime(2025, 7, day), *values]
+
+
+EXPECTED = {
+    'Source': [
+        _day(1, *WORK_VALUES),
+        _day(2, *WORK_VALUES),
+        _day(3, *['Dovolenka'] * 6),
+        _day(4, '08:00', '16:30', 45, 45, None, '08:00:00'),
+        _day(5, '08:00', '16:30', 45, 45, None, '08:00:00'),
+        _day(6, *WORK_VALUES),
+    ],
+    'Target': [
+        ['26:1', '26:2', '26:3', '26:4', 'Popis', '26:9', '26:10', '26:11', '26:12', '26:13', '26:14'],
+        ['27:1', '27:2', '27:3', '27:4', '27:5', '27:9', '27:10', '27:11', '27:12', '27:13', '27:14'],
+        ['28:1', '27:2', '28:3', '28:4', '28:5', '28:9', '28:10', '28:11', '28:12', '28:13', '28:14'],
+        ['29:1', '29:2', '29:3', '29:4', 'Dovolenka', '29:9', '29:9', '29:11', '29:12', '29:13', '29:14'],
+        ['30:1', '30:2', '30:3', '30:4', '30:5', '29:9', '29:9', '30:11', '30:12', '30:13', '30:14'],
+    ],
+}
+
+
+@pytest.fixture
+def merged_workbook(tmp_path):
+    path = str(tmp_path / 'merged.xlsx')
+    _make_workbook(path)
+    return path
+
+
+@pytest.mark.parametrize('strategy, sheet', [('source', 'Source'), ('target', 'Target')])
+def test_extract_data_follows_merged_ranges(merged_workbook, strategy, sheet):
+    config = STRATEGY_REGISTRY[strategy]
+    data = extract_data(
+        merged_workbook,
+        config['column_indices'],
+        header_text=config['header_text'],
+        start_row_strategy=config['start_row_strategy'],
+        header_row_offset=config['header_row_offset'],
+        stop_condition=config['stop_condition'],
+        sheet_name=sheet,
+    )
+    assert data == EXPECTED[sheet]
+
+
+@pytest.mark.parametrize('strategy, sheet', [('source', 'Source'), ('target', 'Target')])
+def test_extract_from_workbook_matches_single_sheet(merged_workbook, strategy, sheet):
+    config = dict(STRATEGY_REGISTRY[strategy], file_path=merged_workbook, sheets=[sheet])
+    assert extract_from_workbook(config) == {sheet: EXPECTED[sheet]}
+
+
+def test_get_real_cell_value_with_and_without_anchors(merged_workbook):
+    wb = load_workbook(merged_workbook, data_only=True)
+    for sheet in wb.worksheets:
+        anchors = extractor_utils._merged_anchor_map(sheet)
+        for row in range(1, sheet.max_row + 1):
+            for col in range(1, 15):
+                expected = extractor_utils._get_real_cell_value(sheet, row, col)
+                assert extractor_utils._get_real_cell_value(sheet, row, col, anchors) == expected
+    assert extractor_utils._get_real_cell_value(wb['Source'], 10, 6) == 45
+    assert extractor_utils._get_real_cell_value(wb['Target'], 28, 2) == '27:2'
+    wb.close()
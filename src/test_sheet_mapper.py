@@ -0,0 +1,70 @@
+import zipfile
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.chart import BarChart, Reference
+
+from src import sheet_mapper
+
+
+def _rewrite_archive(src: str, dst: str, rename: dict, replace: dict):
+    """Copy an xlsx archive, renaming parts and replacing bytes in every part."""
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, 'w') as zout:
+        for name in zin.namelist():
+            data = zin.read(name)
+            for old, new in replace.items():
+                data = data.replace(old, new)
+            zout.writestr(rename.get(name, name), data)
+
+
+def test_extract_sheet_names_matches_openpyxl_with_chartsheets(tmp_path):
+    path = str(tmp_path / 'charts.xlsx')
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Ing. Ján Novák'
+    for row in range(1, 4):
+        ws.cell(row=row, column=1, value=row)
+    # A chartsheet needs a chart for openpyxl to load it back
+    chart = BarChart()
+    chart.add_data(Reference(ws, min_col=1, min_row=1, max_row=3))
+    wb.create_chartsheet('Graf').add_chart(chart)
+    wb.create_sheet('Petra Malá')
+    wb.save(path)
+    expected = ['Ing. Ján Novák', 'Graf', 'Petra Malá']
+    assert load_workbook(path).sheetnames == expected
+    assert load_workbook(path, read_only=True).sheetnames == expected
+    assert sheet_mapper.extract_sheet_names(path) == expected
+
+
+def test_extract_sheet_names_follows_office_document_relationship(tmp_path):
+    original = str(tmp_path / 'original.xlsx')
+    moved = str(tmp_path / 'moved.xlsx')
+    wb = Workbook()
+    wb.create_sheet('Petra Malá')
+    wb.save(original)
+    _rewrite_archive(original, moved,
+                     rename={'xl/workbook.xml': 'xl/book.xml',
+                             'xl/_rels/workbook.xml.rels': 'xl/_rels/book.xml.rels'},
+                     replace={b'xl/workbook.xml': b'xl/book.xml'})
+    assert sheet_mapper.extract_sheet_names(moved) == load_workbook(moved, read_only=True).sheetnames
+    assert sheet_mapper.extract_sheet_names(moved) == ['Sheet', 'Petra Malá']
+
+
+def test_extract_sheet_names_falls_back_to_openpyxl(tmp_path, monkeypatch):
+    path = str(tmp_path / 'plain.xlsx')
+    wb = Workbook()
+    wb.create_sheet('Petra Malá')
+    wb.save(path)
+
+    def broken(archive):
+        raise KeyError('xl/workbook.xml')
+
+    monkeypatch.setattr(sheet_mapper, '_archive_sheet_names', broken)
+    assert sheet_mapper.extract_sheet_names(path) == ['Sheet', 'Petra Malá']
+
+
+def test_extract_sheet_names_missing_file(tmp_path):
+    assert sheet_mapper.extract_sheet_names(str(tmp_path / 'missing.xlsx')) == []
+
+
+def test_extract_sheet_names_directory(tmp_path):
+    assert sheet_mapper.extract_sheet_names(str(tmp_path)) == []
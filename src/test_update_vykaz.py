@@ -1,124 +1,279 @@
-import os
+import sys
 import json
-import tempfile
-import subprocess
-from pathlib import Path
+import glob
+import hashlib
+from datetime import datetime
+
+import pandas as pd
 from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Border, Side
+
+from src import sheet_mapper, update_vykaz
 
-# New tests aligned with refactored runtime mapping pipeline (Step 15)
-# Focus: sheet creation, 31 rows, summary update, cleaned target usage.
+# Tests for the runtime mapping pipeline: day-type transforms, daily rows,
+# summary update, contractor sheets and idempotent re-runs.
 
 DAILY_START_ROW = 26
 DAILY_ROW_COUNT = 31
 SUMMARY_ROW = 57
+PROTECTED_SHEET = 'Inštrukcie k vyplneniu PV'
+
+# July 2025: the 1st is a Tuesday, the 5th a Saturday
+WORK_DAY = ('09:00', '17:00', 60, None, None, '07:00:00')
+WEEKEND_DAY = (' -',) * 6
+HOLIDAY_DAY = ('-', '-', None, None, None, None)
+SOURCE_DAYS = {1: WORK_DAY, 2: 'Dovolenka', 5: WEEKEND_DAY, 6: WEEKEND_DAY, 7: HOLIDAY_DAY}
+THIN_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'),
+                     top=Side(style='thin'), bottom=Side(style='thin'))
 
 
 def _make_source_wb(path: str):
     wb = Workbook()
     ws = wb.active
     ws.title = 'Ing. Test Person'
-    # Provide minimal data for first few days; transform logic pads to 31
-    for day in range(1, 5):
-        ws.cell(row=day, column=2, value='09:00')  # start
-        ws.cell(row=day, column=3, value='17:00')  # end
-        ws.cell(row=day, column=4, value='60')     # break minutes
-        ws.cell(row=day, column=6, value='08:00')  # worked hours
+    ws.cell(row=4, column=2, value='Dátum')
+    # Data starts two rows under the header; days not listed are work days
+    for day in range(1, DAILY_ROW_COUNT + 1):
+        row = day + 5
+        ws.cell(row=row, column=2, value=datetime(2025, 7, day))
+        values = SOURCE_DAYS.get(day, WORK_DAY)
+        if values == 'Dovolenka':
+            ws.cell(row=row, column=3, value=values)
+            ws.merge_cells(start_row=row, start_column=3, end_row=row, end_column=8)
+            continue
+        for offset, value in enumerate(values):
+            ws.cell(row=row, column=3 + offset, value=value)
     wb.save(path)
     wb.close()
 
 
+def _fill_template(ws):
+    ws['A1'] = 'Výkaz'
+    for row in range(DAILY_START_ROW, DAILY_START_ROW + DAILY_ROW_COUNT):
+        ws.cell(row=row, column=1, value='old').border = THIN_BORDER
+        ws.cell(row=row, column=14).border = THIN_BORDER
+        ws.cell(row=row, column=5, value='old popis')
+        ws.merge_cells(start_row=row, start_column=5, end_row=row, end_column=8)
+    # A vertical merge inside the daily block and one outside it
+    ws.merge_cells('B40:C41')
+    ws.merge_cells('P26:Q30')
+
+
 def _make_target_wb(path: str):
     wb = Workbook()
     ws = wb.active
-    ws.title = 'TemplateSheet'
+    ws.title = 'Test Person'
+    _fill_template(ws)
+    _fill_template(wb.create_sheet('Kontraktor Jozef'))
+    wb.create_sheet(PROTECTED_SHEET)['A1'] = 'x'
     wb.save(path)
     wb.close()
 
 
-def _run_script(args: list[str]):
-    cmd = ['python3', '-m', 'src.update_vykaz'] + args
-    return subprocess.run(cmd, capture_output=True, text=True)
-
-
-def test_integration_creates_sheet_and_rows():
-    with tempfile.TemporaryDirectory() as tmp:
-        source = os.path.join(tmp, 'source.xlsx')
-        target = os.path.join(tmp, 'target.xlsx')
-        _make_source_wb(source)
-        _make_target_wb(target)
-        res = _run_script(['--source-excel', source, '--target-excel', target])
-        assert res.returncode == 0, res.stderr
-        wb = load_workbook(target)
-        assert 'Test Person' in wb.sheetnames  # mapped name
-        ws = wb['Test Person']
-        for i in range(DAILY_ROW_COUNT):
-            assert ws.cell(row=DAILY_START_ROW + i, column=1).value == f"{i+1}."
-        wb.close()
-
-
-def test_summary_row_updated():
-    with tempfile.TemporaryDirectory() as tmp:
-        source = os.path.join(tmp, 'source.xlsx')
-        target = os.path.join(tmp, 'target.xlsx')
-        _make_source_wb(source)
-        _make_target_wb(target)
-        res = _run_script(['--source-excel', source, '--target-excel', target])
-        assert res.returncode == 0, res.stderr
-        wb = load_workbook(target, data_only=True)
-        ws = wb['Test Person']
-        assert ws.cell(row=SUMMARY_ROW, column=14).value is not None
-        wb.close()
-
-
-def test_clean_target_path_used():
-    with tempfile.TemporaryDirectory() as tmp:
-        source = os.path.join(tmp, 'source.xlsx')
-        target = os.path.join(tmp, 'target.xlsx')
-        _make_source_wb(source)
-        _make_target_wb(target)
-        wb = load_workbook(target)
-        wb.create_sheet('ExtraUnmatchedSheet')
-        wb.save(target)
-        wb.close()
-        res = _run_script(['--source-excel', source, '--target-excel', target, '--clean-target'])
-        assert res.returncode == 0, res.stderr
-        cleaned_path = Path(target).with_name(Path(target).stem + '_cleaned.xlsx')
-        assert cleaned_path.exists()
-        wb2 = load_workbook(cleaned_path)
-        assert 'ExtraUnmatchedSheet' not in wb2.sheetnames
-        wb2.close()
-
-
-def test_activities_override():
-    with tempfile.TemporaryDirectory() as tmp:
-        source = os.path.join(tmp, 'source.xlsx')
-        target = os.path.join(tmp, 'target.xlsx')
-        activities_json = os.path.join(tmp, 'activities.json')
-        _make_source_wb(source)
-        _make_target_wb(target)
-        override_text = 'Custom Activity Text X'
-        with open(activities_json, 'w', encoding='utf-8') as f:
-            json.dump({'Ing. Test Person': override_text}, f)
-        res = _run_script(['--source-excel', source, '--target-excel', target, '--activities-json', activities_json])
-        assert res.returncode == 0, res.stderr
-        wb = load_workbook(target)
-        ws = wb['Test Person']
-        assert ws.cell(row=DAILY_START_ROW, column=5).value == override_text
-        wb.close()
-
-
-def test_dry_run_no_write():
-    with tempfile.TemporaryDirectory() as tmp:
-        source = os.path.join(tmp, 'source.xlsx')
-        target = os.path.join(tmp, 'target.xlsx')
-        _make_source_wb(source)
-        _make_target_wb(target)
-        before = os.path.getmtime(target)
-        res = _run_script(['--source-excel', source, '--target-excel', target, '--dry-run'])
-        assert res.returncode == 0, res.stderr
-        after = os.path.getmtime(target)
-        assert before == after, 'File should not be modified in dry-run'
+def _run_main(monkeypatch, tmp_path, args: list[str]):
+    """Run update_vykaz.main() in-process with a temporary mappings.json."""
+    mappings = tmp_path / 'mappings.json'
+    mappings.write_text(json.dumps({'protected_sheets': [PROTECTED_SHEET]}), encoding='utf-8')
+    monkeypatch.setattr(sheet_mapper, 'MAPPINGS_JSON_PATH', str(mappings))
+    monkeypatch.setattr(sys, 'argv', ['update_vykaz'] + args)
+    update_vykaz.main()
+
+
+def _run_source_mode(monkeypatch, tmp_path, *extra: str):
+    source = tmp_path / 'source.xlsx'
+    target = tmp_path / 'target.xlsx'
+    if not source.exists():
+        _make_source_wb(str(source))
+        _make_target_wb(str(target))
+    output_dir = tmp_path / 'out'
+    _run_main(monkeypatch, tmp_path, ['--source-excel', str(source), '--target-excel', str(target),
+                                      '--month', 'júl', '--year', '2025',
+                                      '--output-dir', str(output_dir), *extra])
+    outputs = sorted(glob.glob(str(output_dir / 'updated_*.xlsx')))
+    return outputs[-1] if outputs else None
+
+
+def _source_frame(tmp_path):
+    source = tmp_path / 'source.xlsx'
+    _make_source_wb(str(source))
+    df_source = update_vykaz.extract_source_data(str(source), 'Ing. Test Person')
+    return update_vykaz.source_to_target(df_source, None, 'Bratislava')
+
+
+def _day(df, day):
+    return df.iloc[day - 1]
+
+
+def _sheet_state(ws):
+    """Values, merged ranges and borders of a worksheet, for exact comparison."""
+    cells = {}
+    for row in ws.iter_rows():
+        for cell in row:
+            border = cell.border
+            cells[cell.coordinate] = (cell.value, border.left.style, border.right.style,
+                                      border.top.style, border.bottom.style)
+    return cells, sorted(str(r) for r in ws.merged_cells.ranges)
+
+
+def test_source_to_target_work_day(tmp_path):
+    row = _day(_source_frame(tmp_path), 1)
+    assert row['Datum'] == '1.'
+    assert (row['Cas_Vykonu_Od'], row['Cas_Vykonu_Do']) == ('09:00', '17:00')
+    assert row['Prestavka_Trvanie'] == '01:00:00'
+    assert row['Popis_Cinnosti'] == update_vykaz.DEFAULT_ACTIVITY_TEXT
+    assert row['Miesto_Vykonu'] == 'Bratislava'
+    assert row['Pocet_Odpracovanych_Hodin'] == row['SPOLU'] == '07:00:00'
+
+
+def test_source_to_target_weekend(tmp_path):
+    row = _day(_source_frame(tmp_path), 5)
+    assert (row['Cas_Vykonu_Od'], row['Cas_Vykonu_Do'], row['Popis_Cinnosti'], row['Miesto_Vykonu']) == ('', '', '', '')
+    assert row['Prestavka_Trvanie'] == '00:00:00'
+    assert row['SPOLU'] == '00:00:00'
+
+
+def test_source_to_target_holiday(tmp_path):
+    # The source marks public holidays with '-' attendance; they are days off
+    row = _day(_source_frame(tmp_path), 7)
+    assert (row['Cas_Vykonu_Od'], row['Cas_Vykonu_Do'], row['Popis_Cinnosti'], row['Miesto_Vykonu']) == ('', '', '', '')
+    assert row['SPOLU'] == '00:00:00'
+
+
+def test_source_to_target_vacation(tmp_path):
+    row = _day(_source_frame(tmp_path), 2)
+    assert (row['Cas_Vykonu_Od'], row['Cas_Vykonu_Do'], row['Miesto_Vykonu']) == ('', '', '')
+    assert row['Popis_Cinnosti'] == 'DOVOLENKA'
+    assert pd.isna(row['Prestavka_Trvanie'])
+    # The merged 'Dovolenka' cell is carried through as the day's hours
+    assert row['SPOLU'] == 'Dovolenka'
+
+
+def test_source_to_target_keeps_work_day_values_as_is():
+    # Work-day values are copied unchanged, even when they are not HH:MM:SS,
+    # and padding the month does not turn integer columns into floats
+    df_source = pd.DataFrame({
+        'Datum': pd.to_datetime(['2025-07-01', '2025-07-02']),
+        'Dochadzka_Prichod': [9, 'Dovolenka'],
+        'Dochadzka_Odchod': [17, 'Dovolenka'],
+        'Prestavka_min': ['60', 'Dovolenka'],
+        'Prerusenie_Odchod': [None, 'Dovolenka'],
+        'Prerusenie_Prichod': [None, 'Dovolenka'],
+        'Skutocny_Odpracovany_Cas': ['7:30 h', '8:0'],
+    })
+    df = update_vykaz.source_to_target(df_source, None, 'Bratislava')
+    work = _day(df, 1)
+    assert (work['Cas_Vykonu_Od'], work['Cas_Vykonu_Do']) == (9, 17)
+    assert type(work['Cas_Vykonu_Od']) is int
+    assert work['SPOLU'] == '7:30 h'
+    assert _day(df, 2)['SPOLU'] == '08:00:00'
+
+
+def test_contractor_data_day_types():
+    # May 2025: 1st is a public holiday (Thursday), 2nd a Friday, 3rd a Saturday
+    df = update_vykaz.generate_contractor_data(2025, 5, 'Činnosť', 'Bratislava')
+    assert len(df) == DAILY_ROW_COUNT
+    work = _day(df, 2)
+    assert (work['Cas_Vykonu_Od'], work['Cas_Vykonu_Do'], work['Prestavka_Trvanie']) == ('09:00:00', '17:30:00', '00:30:00')
+    assert (work['Popis_Cinnosti'], work['Miesto_Vykonu'], work['SPOLU']) == ('Činnosť', 'Bratislava', '08:00:00')
+    for day in (1, 3):
+        off = _day(df, day)
+        assert (off['Cas_Vykonu_Od'], off['Popis_Cinnosti'], off['SPOLU']) == ('', '', '00:00:00')
+
+
+def test_integration_fills_daily_rows(monkeypatch, tmp_path):
+    output = _run_source_mode(monkeypatch, tmp_path)
+    wb = load_workbook(output)
+    ws = wb['Test Person']
+    for i in range(DAILY_ROW_COUNT):
+        assert ws.cell(row=DAILY_START_ROW + i, column=1).value == f"{i+1}."
+    assert ws.cell(row=DAILY_START_ROW, column=2).value == '09:00'
+    assert ws.cell(row=DAILY_START_ROW + 1, column=5).value == 'DOVOLENKA'
+    wb.close()
+
+
+def test_summary_row_updated(monkeypatch, tmp_path):
+    output = _run_source_mode(monkeypatch, tmp_path)
+    wb = load_workbook(output, data_only=True)
+    ws = wb['Test Person']
+    # 27 work days of 7 hours; the vacation's 'Dovolenka' hours are not summed
+    assert ws.cell(row=SUMMARY_ROW, column=14).value == '189:00:00'
+    wb.close()
+
+
+def test_summary_totals_for_loose_time_formats():
+    # Single-digit fields and surrounding spaces count; each field keeps its
+    # own sign, so '-1:30:00' is -1h + 30min
+    df = pd.DataFrame({'SPOLU': ['8:0:0', ' 08:00:00', '-1:30:00', '00:00:00', '']}, dtype=object)
+    assert update_vykaz.recalculate_summary(df, Workbook().active)[1] == '15:30:00'
+    # Values that are not three integer fields are reported and left out
+    df = pd.DataFrame({'SPOLU': ['480', '8h', '8:00', '1 day', '07:30:00']}, dtype=object)
+    assert update_vykaz.recalculate_summary(df, Workbook().active)[1] == '07:30:00'
+
+
+def test_unmatched_target_sheet_filled_as_contractor(monkeypatch, tmp_path):
+    output = _run_source_mode(monkeypatch, tmp_path)
+    wb = load_workbook(output)
+    assert wb.sheetnames[0] == 'Test Person'
+    ws = wb['Kontraktor Jozef']
+    assert ws.cell(row=DAILY_START_ROW, column=2).value == '09:00:00'
+    assert ws.cell(row=DAILY_START_ROW, column=14).value == '08:00:00'
+    assert wb[PROTECTED_SHEET]['A1'].value == 'x'
+    wb.close()
+
+
+def test_activity_text_override(monkeypatch, tmp_path):
+    override_text = 'Custom Activity Text X'
+    output = _run_source_mode(monkeypatch, tmp_path, '--activity-text', override_text)
+    wb = load_workbook(output)
+    ws = wb['Test Person']
+    assert ws.cell(row=DAILY_START_ROW, column=5).value == override_text
+    wb.close()
+
+
+def test_dry_run_no_write(monkeypatch, tmp_path):
+    source = tmp_path / 'source.xlsx'
+    target = tmp_path / 'target.xlsx'
+    _make_source_wb(str(source))
+    _make_target_wb(str(target))
+    before = hashlib.sha256(target.read_bytes()).hexdigest()
+    assert _run_source_mode(monkeypatch, tmp_path, '--dry-run') is None
+    assert hashlib.sha256(target.read_bytes()).hexdigest() == before, 'File should not be modified in dry-run'
+    assert not (tmp_path / 'backup').exists()
+
+
+def test_rerun_leaves_sheet_unchanged(monkeypatch, tmp_path):
+    first = _run_source_mode(monkeypatch, tmp_path)
+    # Feed the first run's output back in as the target of a second run
+    second_dir = tmp_path / 'out2'
+    _run_main(monkeypatch, tmp_path, ['--source-excel', str(tmp_path / 'source.xlsx'), '--target-excel', first,
+                                      '--month', 'júl', '--year', '2025', '--output-dir', str(second_dir)])
+    second = glob.glob(str(second_dir / 'updated_*.xlsx'))[0]
+    wb_first, wb_second = load_workbook(first), load_workbook(second)
+    assert wb_first.sheetnames == wb_second.sheetnames
+    for name in wb_first.sheetnames:
+        assert _sheet_state(wb_second[name]) == _sheet_state(wb_first[name]), name
+    wb_first.close()
+    wb_second.close()
+
+
+def test_changed_row_in_merged_range_is_rewritten(monkeypatch, tmp_path):
+    first = _run_source_mode(monkeypatch, tmp_path)
+    wb = load_workbook(first)
+    ws = wb['Test Person']
+    merges_before = sorted(str(r) for r in ws.merged_cells.ranges)
+    df_target = _source_frame(tmp_path)
+    # Day 15 (row 40) sits in both the E:H description merge and B40:C41
+    df_target.loc[14, ['Cas_Vykonu_Od', 'Popis_Cinnosti']] = ['10:00', 'Iná činnosť']
+    update_vykaz.update_daily_rows(ws, df_target, DAILY_START_ROW)
+    assert ws['B40'].value == '10:00'
+    assert ws['E40'].value == 'Iná činnosť'
+    assert sorted(str(r) for r in ws.merged_cells.ranges) == merges_before
+    assert {'B40:C41', 'E40:H40'} <= set(merges_before)
+    # Neighbouring rows are untouched
+    assert ws['E39'].value == ws['E41'].value == update_vykaz.DEFAULT_ACTIVITY_TEXT
+    wb.close()
+
 
 if __name__ == '__main__':
     import pytest
-    raise SystemExit(pytest.main([__file__, '-q']))
\ No newline at end of file
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -2,25 +2,38 @@ import openpyxl
 import datetime
 from openpyxl.utils import get_column_letter
 
-def find_cell_by_text_partial(sheet, search_texts):
+def index_text_cells(sheet):
+    """
+    Collect every text cell of a sheet in one pass.
+    Returns a list of (lowercased text, row, col) in row-major order.
+    """
+    cells = []
+    for row_idx, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+        for col_idx, value in enumerate(row, start=1):
+            if value and isinstance(value, str):
+                cells.append((value.lower(), row_idx, col_idx))
+    return cells
+
+def find_cell_by_text_partial(text_cells, search_texts):
     """
     Find cell containing any of the search texts (partial match).
-    Returns (row, col) or None.
+    text_cells comes from index_text_cells, so repeated lookups
+    don't rescan the sheet.
+    Returns (row, col, col_letter) or None.
     """
-    for row in sheet.iter_rows():
-        for cell in row:
-            if cell.value and isinstance(cell.value, str):
-                for text in search_texts:
-                    if text.lower() in cell.value.lower():
-                        return cell.row, cell.column, get_column_letter(cell.column)
+    needles = [text.lower() for text in search_texts]
+    for value, row, col in text_cells:
+        for text in needles:
+            if text in value:
+                return row, col, get_column_letter(col)
     return None
 
-def find_column_by_text(sheet, search_text):
+def find_column_by_text(text_cells, search_text):
     """
     Find exact column by text.
     Returns col number or None.
     """
-    result = find_cell_by_text_partial(sheet, [search_text])
+    result = find_cell_by_text_partial(text_cells, [search_text])
     return result[1] if result else None
 
 def process_hours(h_val):
@@ -31,59 +44,65 @@ def process_hours(h_val):
     else:
         return h_val
 
-# Load source workbook
-source_wb = openpyxl.load_workbook('ronec_dochadzka.xlsx')
+# Load source workbook (only read, so stream it)
+source_wb = openpyxl.load_workbook('ronec_dochadzka.xlsx', read_only=True)
 source_sheet = source_wb.active
 
 # Load target workbook
 target_wb = openpyxl.load_workbook('ronec_vykaz.xlsx')
 target_sheet = target_wb.active
 
-# Find dynamic columns
-source_date_col = find_column_by_text(source_sheet, 'Dátum') or 2  # Default column B
-source_hours_col = find_column_by_text(source_sheet, 'odpracovaný čas') or 8  # Default column H
-prichod_result = find_cell_by_text_partial(source_sheet, ['Príchod', 'Príchd'])
+# Find dynamic columns (each sheet's text cells are scanned once)
+source_text_cells = index_text_cells(source_sheet)
+target_text_cells = index_text_cells(target_sheet)
+source_date_col = find_column_by_text(source_text_cells, 'Dátum') or 2  # Default column B
+source_hours_col = find_column_by_text(source_text_cells, 'odpracovaný čas') or 8  # Default column H
+prichod_result = find_cell_by_text_partial(source_text_cells, ['Príchod', 'Príchd'])
 prichod_col = prichod_result[1] if prichod_result else None
-target_desc_col = find_column_by_text(target_sheet, 'Detailný popis činností vykonávaných na základe Zmluvy o PPM a popis zrealizovaných výstupov')
-target_date_col = find_column_by_text(target_sheet, 'Dátum') or 1  # Assuming column A
-target_hours_col = find_column_by_text(target_sheet, 'Počet odpracovaných hodín*') or 9  # Assuming column I
+target_desc_col = find_column_by_text(target_text_cells, 'Detailný popis činností vykonávaných na základe Zmluvy o PPM a popis zrealizovaných výstupov')
+target_date_col = find_column_by_text(target_text_cells, 'Dátum') or 1  # Assuming column A
+target_hours_col = find_column_by_text(target_text_cells, 'Počet odpracovaných hodín*') or 9  # Assuming column I
 
 
-# Collect merged ranges
+# Collect merged ranges: every covered (row, col) -> the range's top-left (row, col)
 merged_ranges = list(target_sheet.merged_cells)
+merged_anchors = {}
+for range_ in merged_ranges:
+    for range_row in range(range_.min_row, range_.max_row + 1):
+        for range_col in range(range_.min_col, range_.max_col + 1):
+            merged_anchors.setdefault((range_row, range_col), (range_.min_row, range_.min_col))
 
 def get_real_cell(row, col):
-    for range_ in merged_ranges:
-        if range_.min_row <= row <= range_.max_row and range_.min_col <= col <= range_.max_col:
-            return target_sheet.cell(row=range_.min_row, column=range_.min_col)
+    row, col = merged_anchors.get((row, col), (row, col))
     return target_sheet.cell(row=row, column=col)
 
+# Read the source rows once; data starts below headers (after row 6)
+source_rows = list(source_sheet.iter_rows(min_row=7, values_only=True))
+source_wb.close()
+
+def row_value(row_values, col):
+    return row_values[col - 1] if col <= len(row_values) else None
+
 # Collect July date and hours data from source
 data = []
-row = 7  # Data starts below headers (after row 6)
-
-while True:
-    date = source_sheet.cell(row=row, column=source_date_col).value
-    hours = source_sheet.cell(row=row, column=source_hours_col).value
+for row_values in source_rows:
+    date = row_value(row_values, source_date_col)
+    hours = row_value(row_values, source_hours_col)
     if not date or not hours:
         break
     # Filter for July dates (month 7)
     if isinstance(date, datetime.date) and date.month == 7:
         date_day = str(date.day) + '.'
         data.append((date_day, hours))
-    row += 1
 
 # Collect Dovolenka dates from 'Príchod' column
 dovolenka_dates = []
 if prichod_col:
-    row = 7
-    max_row = source_sheet.max_row
-    while row <= max_row:
-        prichod_val = source_sheet.cell(row=row, column=prichod_col).value
-        date_val = source_sheet.cell(row=row, column=source_date_col).value
+    for row_values in source_rows:
+        prichod_val = row_value(row_values, prichod_col)
+        date_val = row_value(row_values, source_date_col)
         if isinstance(prichod_val, str) and prichod_val.strip() == 'Dovolenka' and isinstance(date_val, datetime.date) and date_val.month == 7:
             dovolenka_dates.append(str(date_val.day) + '.')
-        row += 1
 
 # Transfer data to target
 for i, (date_val, hours_val) in enumerate(data):
@@ -94,11 +113,15 @@ for i, (date_val, hours_val) in enumerate(data):
 # Transfer Dovolenka to target description column
 if target_desc_col and dovolenka_dates:
     # Build date to row mapping in target
+    # One pass down the date column; only merged cells need the anchor lookup
     target_date_rows = {}
-    for row in range(26, target_sheet.max_row + 1):  # Assuming data starts at row 26
-        date_cell = get_real_cell(row, target_date_col)
-        if date_cell.value:
-            target_date_rows[str(date_cell.value).strip()] = row
+    date_values = target_sheet.iter_rows(min_row=26, min_col=target_date_col,  # Assuming data starts at row 26
+                                         max_col=target_date_col, values_only=True)
+    for row, (date_value,) in enumerate(date_values, start=26):
+        if (row, target_date_col) in merged_anchors:
+            date_value = get_real_cell(row, target_date_col).value
+        if date_value:
+            target_date_rows[str(date_value).strip()] = row
 
     # Set Dovolenka for matching dates
     for dov_date in dovolenka_dates:
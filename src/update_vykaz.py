@@ -1,17 +1,50 @@
 import argparse
 import calendar
+import csv
+import json
 import shutil
 import os
 import logging
+from collections import Counter
 from datetime import datetime, timedelta, date
+from functools import lru_cache
 from typing import Dict, List, Tuple, Any, Optional
 import pandas as pd
 from openpyxl import load_workbook
 
-from src.extractor_utils import extract_from_workbook, open_workbooks
+from src.extractor_utils import STRATEGY_REGISTRY, extract_from_workbook
 from src import sheet_mapper
 
-logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# Fixed shape of the daily block in the target report: one row per possible day
+DAILY_ROW_COUNT = 31
+# Day labels written to the Datum column ("1." .. "31.")
+DAY_LABELS = tuple(f"{day}." for day in range(1, DAILY_ROW_COUNT + 1))
+TARGET_COLUMNS = ('Datum', 'Cas_Vykonu_Od', 'Cas_Vykonu_Do', 'Prestavka_Trvanie',
+                  'Popis_Cinnosti', 'Pocet_Odpracovanych_Hodin', 'Miesto_Vykonu',
+                  'PH_Projekt_POO', 'PH_Riesenie_POO', 'PH_Mimo_Projekt_POO', 'SPOLU')
+# Target columns holding HH:MM:SS durations, sanitized before writing
+TIME_COLUMNS = ('Pocet_Odpracovanych_Hodin', 'Prestavka_Trvanie', 'PH_Projekt_POO',
+                'PH_Riesenie_POO', 'PH_Mimo_Projekt_POO', 'SPOLU')
+# Source attendance columns; a dated day with all of them blank is a day off
+ATTENDANCE_FIELDS = ('Dochadzka_Prichod', 'Dochadzka_Odchod', 'Prestavka_min',
+                     'Prerusenie_Odchod', 'Prerusenie_Prichod', 'Skutocny_Odpracovany_Cas')
+# Rightmost column of the daily block (SPOLU, column N)
+LAST_DAILY_COLUMN = 14
+# Sheet column of each TARGET_COLUMNS entry in the daily block; Popis_Cinnosti
+# sits in column 5 of the merged E:H description cell
+DAILY_COLUMN_NUMBERS = (1, 2, 3, 4, 5, 9, 10, 11, 12, 13, LAST_DAILY_COLUMN)
+POPIS_INDEX = TARGET_COLUMNS.index('Popis_Cinnosti')
+
+# Activity description used on work days when --activity-text is not given
+DEFAULT_ACTIVITY_TEXT = "Pracovná činnosť"
+
+# Extraction strategies, resolved once at import
+SOURCE_STRATEGY = STRATEGY_REGISTRY["source"]
+TARGET_STRATEGY = STRATEGY_REGISTRY["target"]
+# First daily row of the target report (the target strategy's fixed start row)
+DATA_START_ROW = TARGET_STRATEGY["start_row_strategy"](None)
 
 
 def parse_args() -> argparse.Namespace:
@@ -39,38 +72,51 @@ def parse_args() -> argparse.Namespace:
                        help="Skip removing unmatched target sheets")
     parser.add_argument("--no-sort-target", action="store_true", default=False,
                        help="Skip sorting target sheets based on source sheet order")
+    parser.add_argument("--no-transformed-csv", action="store_true", default=False,
+                       help="Skip writing per-sheet transformed CSVs to <output-dir>/transformed")
     return parser.parse_args()
 
 
-def extract_source_data(source_excel: str, sheet_name: str = None) -> pd.DataFrame:
-    """Extract source data from Excel file using extractor_utils."""
-    # Use the source strategy directly from STRATEGY_REGISTRY
-    from src.extractor_utils import STRATEGY_REGISTRY
-    
-    source_strategy = STRATEGY_REGISTRY["source"]
+@lru_cache(maxsize=4)
+def _extract_all_source_sheets(source_excel: str, mtime_ns: int, size: int) -> Dict[str, List[List[Any]]]:
+    """Extract every sheet of the source workbook in one parse.
+
+    Cached per file version (the mtime/size arguments), so the per-sheet calls
+    made for one run share a single openpyxl load.
+    """
     config = {
         'file_path': source_excel,
-        'sheets': [sheet_name] if sheet_name else "__ALL__",  # Extract from specific sheet or all sheets
-        'column_indices': source_strategy["column_indices"],
-        'header_text': source_strategy["header_text"],
-        'header_row_offset': source_strategy["header_row_offset"],
-        'start_row_strategy': source_strategy["start_row_strategy"],
-        'stop_condition': source_strategy["stop_condition"]
+        'sheets': "__ALL__",
+        'column_indices': SOURCE_STRATEGY["column_indices"],
+        'header_text': SOURCE_STRATEGY["header_text"],
+        'header_row_offset': SOURCE_STRATEGY["header_row_offset"],
+        'start_row_strategy': SOURCE_STRATEGY["start_row_strategy"],
+        'stop_condition': SOURCE_STRATEGY["stop_condition"]
     }
-    
-    results = extract_from_workbook(config)
-    
+    return extract_from_workbook(config)
+
+
+def extract_source_data(source_excel: str, sheet_name: str = None) -> pd.DataFrame:
+    """Extract source data from Excel file using extractor_utils."""
+    stat = os.stat(source_excel)
+    results = _extract_all_source_sheets(source_excel, stat.st_mtime_ns, stat.st_size)
+
     # For now, use the first sheet's data (or specified sheet)
     if not results:
         raise ValueError(f"No data extracted from {source_excel}")
-    
+
     # Get the target sheet's data
-    if sheet_name and sheet_name in results:
-        data = results[sheet_name]
+    if sheet_name:
+        if sheet_name not in results:
+            logger.error("Sheet %r not found in %s", sheet_name, source_excel)
+        data = results.get(sheet_name, [])
     else:
-        sheet_name = list(results.keys())[0]
-        data = results[sheet_name]
-    
+        data = next(iter(results.values()))
+    return _build_source_df(data)
+
+
+def _build_source_df(data: List[List[Any]]) -> pd.DataFrame:
+    """Turn extracted source rows into the cleaned attendance DataFrame."""
     # Convert to DataFrame with expected column names
     columns = ['Datum', 'Dochadzka_Prichod', 'Dochadzka_Odchod', 'Prestavka_min', 
                'Prerusenie_Odchod', 'Prerusenie_Prichod', 'Skutocny_Odpracovany_Cas']
@@ -78,159 +124,134 @@ def extract_source_data(source_excel: str, sheet_name: str = None) -> pd.DataFra
     df = pd.DataFrame(data, columns=columns)
     
     # Clean and process data
-    df['Skutocny_Odpracovany_Cas'] = df['Skutocny_Odpracovany_Cas'].astype(str).str.strip().replace(' -', '-', regex=False)
-    df['Prestavka_min'] = df['Prestavka_min'].astype(str).str.strip().replace(' -', '-', regex=False)
+    # (strip already turns ' -' into '-', so no separate replace is needed)
+    for col in ('Skutocny_Odpracovany_Cas', 'Prestavka_min'):
+        df[col] = df[col].astype(str).str.strip()
     
     # Parse dates
     df['Datum'] = pd.to_datetime(df['Datum'], errors='coerce')
     
-    # Clean NaN values
-    numeric_cols = df.select_dtypes(include=['number']).columns
-    df[numeric_cols] = df[numeric_cols].fillna('-')
-    
+    # Missing values stay NaN; source_to_target treats NaN and '-' alike
     return df
 
 
+def _minutes_to_hhmmss(mins: int) -> str:
+    # Only the time of day is kept: minute counts are taken modulo 24h (1440 minutes)
+    hours, mins_part = divmod(mins % 1440, 60)
+    return f"{hours:02}:{mins_part:02}:00"
+
+
+@lru_cache(maxsize=1024)
+def _sanitize_time_str(value: str) -> str:
+    """Normalize a time string; cached because the same few values repeat across rows and sheets."""
+    v = value.strip()
+    if v == '-' or v == '':
+        return ''
+    # Common already-HH:MM:SS
+    if ':' in v:
+        parts = v.split(':')
+        if len(parts) == 2:
+            # mm:ss or hh:mm -> make hh:mm:00
+            return f"{int(parts[0]):02}:{int(parts[1]):02}:00"
+        if len(parts) == 3:
+            try:
+                h, m, s = map(int, parts)
+                return f"{h:02}:{m:02}:{s:02}"
+            except Exception:
+                return v
+    # Try parse as integer minutes string
+    if v.isdigit():
+        try:
+            return _minutes_to_hhmmss(int(v))
+        except Exception:
+            return ''
+    return v
+
+
+def _sanitize_time(value):
+    """Ensure time values are in HH:MM:SS string format. Return empty string for invalid values."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    # If it's a set containing a single string, unwrap it
+    if isinstance(value, set) and len(value) == 1:
+        value = next(iter(value))
+    # If it's a number (minutes), convert to HH:MM:SS
+    if isinstance(value, (int, float)) and not pd.isna(value):
+        try:
+            return _minutes_to_hhmmss(int(value))
+        except Exception:
+            return ''
+    # If it's already a string, try to normalize common cases
+    if isinstance(value, str):
+        return _sanitize_time_str(value)
+
+
+def _format_break_minutes(p_min: pd.Series) -> pd.Series:
+    """Format break lengths in minutes as HH:MM:00, wrapping past 24h.
+
+    Numbers and digit-only strings count; anything else (including '-' and
+    strings like '60.0') is formatted as '00:00:00'.
+    """
+    is_str = p_min.map(lambda v: isinstance(v, str))
+    is_digits = p_min.where(is_str, '').astype(str).str.fullmatch(r'\d+')
+    mins = pd.to_numeric(p_min.where(is_digits | ~is_str), errors='coerce').fillna(0)
+    secs = (mins * 60 // 1 % 86400).astype('int64')
+    return (
+        (secs // 3600).astype(str).str.zfill(2) + ':'
+        + (secs % 3600 // 60).astype(str).str.zfill(2) + ':00'
+    ).astype(object)
+
+
 def source_to_target(df_source: pd.DataFrame, activity_text: str, work_location: str) -> pd.DataFrame:
     """Transform source data to target format."""
-    cols = ['Datum', 'Cas_Vykonu_Od', 'Cas_Vykonu_Do', 'Prestavka_Trvanie', 
-            'Popis_Cinnosti', 'Pocet_Odpracovanych_Hodin', 'Miesto_Vykonu', 
-            'PH_Projekt_POO', 'PH_Riesenie_POO', 'PH_Mimo_Projekt_POO', 'SPOLU']
-    
-    df_target = pd.DataFrame(columns=cols, index=range(31))
-    
-    # Extract day numbers for all 31 days
-    df_target['Datum'] = [str(i + 1) + '.' for i in range(31)]
-    
-    def get_prestavka(row):
-        p_min = row['Prestavka_min']
-        if p_min == '-' or pd.isna(p_min):
-            return '00:00:00'
-        if isinstance(p_min, str) and p_min.isdigit():
-            mins = int(p_min)
-        elif isinstance(p_min, (int, float)):
-            mins = p_min
-        else:
-            return '00:00:00'
-        try:
-            td = timedelta(minutes=mins)
-            hours = td.seconds // 3600
-            mins_part = (td.seconds % 3600) // 60
-            return f"{hours:02}:{mins_part:02}:00"
-        except:
-            return '00:00:00'
-    
     # Default activity text if none provided
     if not activity_text:
-        activity_text = "Pracovná činnosť"
-    
-    def _sanitize_time(value):
-        """Ensure time values are in HH:MM:SS string format. Return empty string for invalid values."""
-        if value is None or (isinstance(value, float) and pd.isna(value)):
-            return ''
-        # If it's a set containing a single string, unwrap it
-        if isinstance(value, set) and len(value) == 1:
-            value = next(iter(value))
-        # If it's a number (minutes), convert to HH:MM:SS
-        if isinstance(value, (int, float)) and not pd.isna(value):
-            try:
-                mins = int(value)
-                td = timedelta(minutes=mins)
-                hours = td.seconds // 3600
-                mins_part = (td.seconds % 3600) // 60
-                return f"{hours:02}:{mins_part:02}:00"
-            except Exception:
-                return ''
-        # If it's already a string, try to normalize common cases
-        if isinstance(value, str):
-            v = value.strip()
-            if v == '-' or v == '':
-                return ''
-            # Common already-HH:MM:SS
-            if ':' in v:
-                parts = v.split(':')
-                if len(parts) == 2:
-                    # mm:ss or hh:mm -> make hh:mm:00
-                    return f"{int(parts[0]):02}:{int(parts[1]):02}:00"
-                if len(parts) == 3:
-                    try:
-                        h, m, s = map(int, parts)
-                        return f"{h:02}:{m:02}:{s:02}"
-                    except Exception:
-                        return v
-            # Try parse as integer minutes string
-            if v.isdigit():
-                try:
-                    mins = int(v)
-                    td = timedelta(minutes=mins)
-                    hours = td.seconds // 3600
-                    mins_part = (td.seconds % 3600) // 60
-                    return f"{hours:02}:{mins_part:02}:00"
-                except Exception:
-                    return ''
-            return v
-
-    for i in range(31):
-        if i < len(df_source):
-            row = df_source.iloc[i]
-            dochadzka = row['Dochadzka_Prichod']
-        else:
-            dochadzka = '-'
-            row = None
-        
-        # Compact template-based approach
-        templates = {
-            'vacation': {'Popis_Cinnosti': 'DOVOLENKA', 'Pocet_Odpracovanych_Hodin': row['Skutocny_Odpracovany_Cas'] if row is not None else '00:00:00', 'SPOLU': row['Skutocny_Odpracovany_Cas'] if row is not None else '00:00:00'},
-            'absent': {'Prestavka_Trvanie': '00:00:00'},
-            'weekend': {'Prestavka_Trvanie': '00:00:00'}
-        }
-        
-        # Set defaults for all non-work days
-        zero_fields = ['PH_Projekt_POO', 'PH_Riesenie_POO', 'PH_Mimo_Projekt_POO']
-        empty_fields = ['Cas_Vykonu_Od', 'Cas_Vykonu_Do', 'Miesto_Vykonu', 'Popis_Cinnosti']
-        
-        # Determine day type
-        if dochadzka == 'Dovolenka':
-            day_type = 'vacation'
-        elif (dochadzka == '-' or pd.isna(dochadzka) or 
-              (row is not None and not pd.isna(row['Datum']) and 
-               all(pd.isna(row[col]) or str(row[col]).strip() == '-' 
-                   for col in ['Dochadzka_Prichod', 'Dochadzka_Odchod', 'Prestavka_min', 
-                               'Prerusenie_Odchod', 'Prerusenie_Prichod', 'Skutocny_Odpracovany_Cas']))):
-            day_type = 'weekend' if (row is not None and not pd.isna(row['Datum'])) else 'absent'
-        else:
-            day_type = 'work'
-        
-        if day_type != 'work':
-            # Apply non-work template
-            for field in zero_fields:
-                df_target.loc[i, field] = '00:00:00'
-            for field in empty_fields:
-                df_target.loc[i, field] = ''
-            df_target.loc[i, 'Pocet_Odpracovanych_Hodin'] = '00:00:00'
-            df_target.loc[i, 'SPOLU'] = '00:00:00'
-            # Apply specific template overrides
-            for field, value in templates.get(day_type, {}).items():
-                # sanitize when setting template values
-                if field in ('Pocet_Odpracovanych_Hodin', 'SPOLU', 'Prestavka_Trvanie'):
-                    df_target.loc[i, field] = _sanitize_time(value)
-                else:
-                    df_target.loc[i, field] = value
-            logging.info(f"Applied {day_type} template to row {i}")
-        else:
-            # Work day
-            worked_hours = row['Skutocny_Odpracovany_Cas']
-            df_target.loc[i, 'Cas_Vykonu_Od'] = row['Dochadzka_Prichod']
-            df_target.loc[i, 'Cas_Vykonu_Do'] = row['Dochadzka_Odchod']
-            df_target.loc[i, 'Prestavka_Trvanie'] = _sanitize_time(get_prestavka(row))
-            df_target.loc[i, 'Popis_Cinnosti'] = activity_text
-            df_target.loc[i, 'Pocet_Odpracovanych_Hodin'] = worked_hours
-            df_target.loc[i, 'Miesto_Vykonu'] = work_location
-            for field in zero_fields:
-                df_target.loc[i, field] = '00:00:00'
-            df_target.loc[i, 'SPOLU'] = worked_hours
-            logging.info(f"Applied work template to row {i}")
+        activity_text = DEFAULT_ACTIVITY_TEXT
     
+    # One row per target day; days past the end of the source come out all-NaN.
+    # Padding an object frame keeps integer values as ints instead of upcasting to float
+    src = df_source.head(DAILY_ROW_COUNT).reset_index(drop=True).astype(object).reindex(range(DAILY_ROW_COUNT))
+
+    # Classify every day at once: vacation, work, or a non-work day (weekend
+    # when the source has a date for it, absent otherwise)
+    dochadzka = src['Dochadzka_Prichod']
+    is_vacation = dochadzka.eq('Dovolenka')
+    blank_attendance = src[list(ATTENDANCE_FIELDS)].apply(
+        lambda col: col.isna() | col.astype(str).str.strip().eq('-')
+    ).all(axis=1)
+    has_date = src['Datum'].notna()
+    is_off = ~is_vacation & (dochadzka.eq('-') | dochadzka.isna() | (has_date & blank_attendance))
+    is_work = ~is_vacation & ~is_off
+
+    worked = src['Skutocny_Odpracovany_Cas']
+    # Work days copy the source value as is; only vacation values are sanitized
+    hours = worked.where(is_work, '00:00:00')
+    hours[is_vacation] = worked[is_vacation].map(_sanitize_time)
+    prestavka = _format_break_minutes(src['Prestavka_min']).where(is_work, '00:00:00').where(~is_vacation)
+    popis = pd.Series('', index=src.index, dtype=object)
+    popis[is_work] = activity_text
+    popis[is_vacation] = 'DOVOLENKA'
+
+    df_target = pd.DataFrame({
+        'Datum': list(DAY_LABELS),
+        'Cas_Vykonu_Od': dochadzka.where(is_work, ''),
+        'Cas_Vykonu_Do': src['Dochadzka_Odchod'].where(is_work, ''),
+        'Prestavka_Trvanie': prestavka,
+        'Popis_Cinnosti': popis,
+        'Pocet_Odpracovanych_Hodin': hours,
+        'Miesto_Vykonu': pd.Series(work_location, index=src.index, dtype=object).where(is_work, ''),
+        'PH_Projekt_POO': '00:00:00',
+        'PH_Riesenie_POO': '00:00:00',
+        'PH_Mimo_Projekt_POO': '00:00:00',
+        'SPOLU': hours,
+    }, columns=list(TARGET_COLUMNS))
+
+    n_vacation = int(is_vacation.sum())
+    n_weekend = int((is_off & has_date).sum())
+    logger.info(
+        "Applied templates: %d work, %d vacation, %d weekend, %d absent",
+        int(is_work.sum()), n_vacation, n_weekend, int(is_off.sum()) - n_weekend,
+    )
     return df_target
 
 
@@ -299,62 +320,69 @@ def generate_contractor_data(year: int, month: int, activity_text: str, work_loc
     Returns:
         DataFrame with 31 rows in the same format as source_to_target output.
     """
-    cols = ['Datum', 'Cas_Vykonu_Od', 'Cas_Vykonu_Do', 'Prestavka_Trvanie',
-            'Popis_Cinnosti', 'Pocet_Odpracovanych_Hodin', 'Miesto_Vykonu',
-            'PH_Projekt_POO', 'PH_Riesenie_POO', 'PH_Mimo_Projekt_POO', 'SPOLU']
+    return _frame_from_day_rows(_contractor_day_rows(year, month, activity_text, work_location))
 
-    df = pd.DataFrame(columns=cols, index=range(31))
-    df['Datum'] = [str(i + 1) + '.' for i in range(31)]
 
+def _contractor_day_rows(year: int, month: int, activity_text: str, work_location: str) -> List[tuple]:
+    """Return 31 (Cas_Vykonu_Od, Cas_Vykonu_Do, Prestavka_Trvanie, Popis_Cinnosti,
+    Pocet_Odpracovanych_Hodin, Miesto_Vykonu) tuples for a standard contractor month."""
     if not activity_text:
-        activity_text = "Pracovná činnosť"
+        activity_text = DEFAULT_ACTIVITY_TEXT
 
     days_in_month = calendar.monthrange(year, month)[1]
     rest_days = slovak_days_of_rest(year, month)
-    zero_fields = ['PH_Projekt_POO', 'PH_Riesenie_POO', 'PH_Mimo_Projekt_POO']
 
-    for i in range(31):
+    # Row layouts for columns Cas_Vykonu_Od .. Miesto_Vykonu
+    off_row = ('', '', '00:00:00', '', '00:00:00', '')
+    work_row = ('09:00:00', '17:30:00', '00:30:00', activity_text, '08:00:00', work_location)
+
+    rows = []
+    counts = Counter()
+    for i in range(DAILY_ROW_COUNT):
         day_num = i + 1
-        for field in zero_fields:
-            df.loc[i, field] = '00:00:00'
 
         if day_num > days_in_month:
             # Day doesn't exist in this month — treat as absent
-            df.loc[i, 'Cas_Vykonu_Od'] = ''
-            df.loc[i, 'Cas_Vykonu_Do'] = ''
-            df.loc[i, 'Prestavka_Trvanie'] = '00:00:00'
-            df.loc[i, 'Popis_Cinnosti'] = ''
-            df.loc[i, 'Pocet_Odpracovanych_Hodin'] = '00:00:00'
-            df.loc[i, 'Miesto_Vykonu'] = ''
-            df.loc[i, 'SPOLU'] = '00:00:00'
-            logging.info(f"Applied absent template to row {i} (day {day_num} beyond month)")
+            rows.append(off_row)
+            counts['absent'] += 1
             continue
 
         weekday = calendar.weekday(year, month, day_num)  # 0=Mon, 6=Sun
 
         if weekday >= 5 or day_num in rest_days:
             # Weekend or Slovak public holiday (deň pracovného pokoja) — non-work
-            df.loc[i, 'Cas_Vykonu_Od'] = ''
-            df.loc[i, 'Cas_Vykonu_Do'] = ''
-            df.loc[i, 'Prestavka_Trvanie'] = '00:00:00'
-            df.loc[i, 'Popis_Cinnosti'] = ''
-            df.loc[i, 'Pocet_Odpracovanych_Hodin'] = '00:00:00'
-            df.loc[i, 'Miesto_Vykonu'] = ''
-            df.loc[i, 'SPOLU'] = '00:00:00'
-            label = 'weekend' if weekday >= 5 else 'holiday'
-            logging.info(f"Applied {label} template to row {i}")
+            rows.append(off_row)
+            counts['weekend' if weekday >= 5 else 'holiday'] += 1
         else:
             # Business day — standard 8-hour shift
-            df.loc[i, 'Cas_Vykonu_Od'] = '09:00:00'
-            df.loc[i, 'Cas_Vykonu_Do'] = '17:30:00'
-            df.loc[i, 'Prestavka_Trvanie'] = '00:30:00'
-            df.loc[i, 'Popis_Cinnosti'] = activity_text
-            df.loc[i, 'Pocet_Odpracovanych_Hodin'] = '08:00:00'
-            df.loc[i, 'Miesto_Vykonu'] = work_location
-            df.loc[i, 'SPOLU'] = '08:00:00'
-            logging.info(f"Applied contractor work template to row {i}")
-
-    return df
+            rows.append(work_row)
+            counts['work'] += 1
+
+    logger.info(
+        "Applied contractor templates: %d work, %d weekend, %d holiday, %d absent",
+        counts['work'], counts['weekend'], counts['holiday'], counts['absent'],
+    )
+    return rows
+
+
+def _frame_from_day_rows(rows: List[tuple]) -> pd.DataFrame:
+    """Build a target DataFrame from per-day tuples; SPOLU mirrors the worked hours
+    and the PH_* project columns are always zero."""
+    cas_od, cas_do, prestavka, popis, hours, miesto = (list(col) for col in zip(*rows))
+    zeros = ['00:00:00'] * DAILY_ROW_COUNT
+    return pd.DataFrame({
+        'Datum': list(DAY_LABELS),
+        'Cas_Vykonu_Od': cas_od,
+        'Cas_Vykonu_Do': cas_do,
+        'Prestavka_Trvanie': prestavka,
+        'Popis_Cinnosti': popis,
+        'Pocet_Odpracovanych_Hodin': hours,
+        'Miesto_Vykonu': miesto,
+        'PH_Projekt_POO': zeros,
+        'PH_Riesenie_POO': zeros,
+        'PH_Mimo_Projekt_POO': zeros,
+        'SPOLU': list(hours),
+    }, columns=list(TARGET_COLUMNS))
 
 
 def generate_data_with_vacations(year: int, month: int, activity_text: str,
@@ -372,11 +400,11 @@ def generate_data_with_vacations(year: int, month: int, activity_text: str,
     Returns:
         DataFrame with 31 rows in the same format as source_to_target output.
     """
-    # Start with standard contractor data (8h on business days)
-    df = generate_contractor_data(year, month, activity_text, work_location)
+    # Start with standard contractor rows (8h on business days)
+    rows = _contractor_day_rows(year, month, activity_text, work_location)
 
     if not vacation_days:
-        return df
+        return _frame_from_day_rows(rows)
 
     # Build lookup: day_num -> vacation type
     # 'full' for full-day, 'morning'/'afternoon' for half-day (which half is vacation)
@@ -391,55 +419,34 @@ def generate_data_with_vacations(year: int, month: int, activity_text: str,
     rest_days = slovak_days_of_rest(year, month)
 
     for day_num, vac_type in vac_lookup.items():
-        if day_num > days_in_month:
+        if not 1 <= day_num <= days_in_month:
             continue
         if day_num in rest_days:
             # A public holiday is a day off already — it is never recorded as vacation.
-            logging.info(f"Skipping vacation on day {day_num} (Slovak public holiday)")
+            logger.info("Skipping vacation on day %s (Slovak public holiday)", day_num)
             continue
         i = day_num - 1  # row index
 
         if vac_type == 'full':
             # Full-day vacation
-            df.loc[i, 'Cas_Vykonu_Od'] = ''
-            df.loc[i, 'Cas_Vykonu_Do'] = ''
-            df.loc[i, 'Prestavka_Trvanie'] = '00:00:00'
-            df.loc[i, 'Popis_Cinnosti'] = 'DOVOLENKA'
-            df.loc[i, 'Pocet_Odpracovanych_Hodin'] = '08:00:00'
-            df.loc[i, 'Miesto_Vykonu'] = ''
-            df.loc[i, 'PH_Projekt_POO'] = '00:00:00'
-            df.loc[i, 'PH_Riesenie_POO'] = '00:00:00'
-            df.loc[i, 'PH_Mimo_Projekt_POO'] = '00:00:00'
-            df.loc[i, 'SPOLU'] = '08:00:00'
-            logging.info(f"Applied full-day vacation to day {day_num}")
+            start, end, popis, hours, location = '', '', 'DOVOLENKA', '08:00:00', ''
+            message = "Applied full-day vacation to day %d"
         elif vac_type == 'morning':
             # Morning is vacation → work afternoon
-            df.loc[i, 'Cas_Vykonu_Od'] = '13:00:00'
-            df.loc[i, 'Cas_Vykonu_Do'] = '17:00:00'
-            df.loc[i, 'Prestavka_Trvanie'] = '00:00:00'
-            df.loc[i, 'Popis_Cinnosti'] = activity_text
-            df.loc[i, 'Pocet_Odpracovanych_Hodin'] = '04:00:00'
-            df.loc[i, 'Miesto_Vykonu'] = work_location
-            df.loc[i, 'PH_Projekt_POO'] = '00:00:00'
-            df.loc[i, 'PH_Riesenie_POO'] = '00:00:00'
-            df.loc[i, 'PH_Mimo_Projekt_POO'] = '00:00:00'
-            df.loc[i, 'SPOLU'] = '04:00:00'
-            logging.info(f"Applied morning-vacation (work afternoon) to day {day_num}")
+            start, end, popis, hours, location = '13:00:00', '17:00:00', activity_text, '04:00:00', work_location
+            message = "Applied morning-vacation (work afternoon) to day %d"
         elif vac_type == 'afternoon':
             # Afternoon is vacation → work morning
-            df.loc[i, 'Cas_Vykonu_Od'] = '09:00:00'
-            df.loc[i, 'Cas_Vykonu_Do'] = '13:00:00'
-            df.loc[i, 'Prestavka_Trvanie'] = '00:00:00'
-            df.loc[i, 'Popis_Cinnosti'] = activity_text
-            df.loc[i, 'Pocet_Odpracovanych_Hodin'] = '04:00:00'
-            df.loc[i, 'Miesto_Vykonu'] = work_location
-            df.loc[i, 'PH_Projekt_POO'] = '00:00:00'
-            df.loc[i, 'PH_Riesenie_POO'] = '00:00:00'
-            df.loc[i, 'PH_Mimo_Projekt_POO'] = '00:00:00'
-            df.loc[i, 'SPOLU'] = '04:00:00'
-            logging.info(f"Applied afternoon-vacation (work morning) to day {day_num}")
+            start, end, popis, hours, location = '09:00:00', '13:00:00', activity_text, '04:00:00', work_location
+            message = "Applied afternoon-vacation (work morning) to day %d"
+        else:
+            continue
 
-    return df
+        # Replace the day's row before the frame exists; hours also feed SPOLU
+        rows[i] = (start, end, '00:00:00', popis, hours, location)
+        logger.debug(message, day_num)
+
+    return _frame_from_day_rows(rows)
 
 
 def load_vacations(json_path: str) -> dict:
@@ -448,7 +455,6 @@ def load_vacations(json_path: str) -> dict:
     Returns:
         Dict with keys: month, year, vacations (employee_name -> list of vacation entries)
     """
-    import json
     with open(json_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
@@ -458,136 +464,216 @@ def match_vacation_to_sheet(sheet_name: str, vacations: dict) -> Optional[List]:
 
     Returns the vacation day list if matched, None otherwise.
     """
-    from src.sheet_mapper import _normalize_name
-    norm_sheet = _normalize_name(sheet_name)
+    norm_sheet = sheet_mapper._normalize_name(sheet_name)
     for emp_name, days in vacations.items():
-        if _normalize_name(emp_name) == norm_sheet:
+        if sheet_mapper._normalize_name(emp_name) == norm_sheet:
             return days
     return None
 
 
 def update_daily_rows(ws, df_target: pd.DataFrame, data_start_row: int):
     """Update daily rows in the target worksheet."""
-    col_mappings = {
-        'Datum': 1,
-        'Cas_Vykonu_Od': 2,
-        'Cas_Vykonu_Do': 3,
-        'Prestavka_Trvanie': 4,
-        'Popis_Cinnosti': 5,
-        'Pocet_Odpracovanych_Hodin': 9,
-        'Miesto_Vykonu': 10,
-        'PH_Projekt_POO': 11,
-        'PH_Riesenie_POO': 12,
-        'PH_Mimo_Projekt_POO': 13,
-        'SPOLU': 14
-    }
-    
-    # Store original merged ranges to restore later
-    original_ranges = list(ws.merged_cells.ranges)
-    unmerged_coords = set()
+    # Clean all values up front with column masks: missing values and '-'
+    # placeholders become empty cells ('-' padded with spaces too, in the
+    # time columns, which may also carry single-element sets)
+    frame = df_target[list(TARGET_COLUMNS)].copy()
+    time_cols = [c for c in TARGET_COLUMNS if c in TIME_COLUMNS]
+    for c in time_cols:
+        frame[c] = frame[c].map(lambda v: next(iter(v)) if isinstance(v, set) and len(v) == 1 else v)
+    blank = frame.isna() | frame.eq('-')
+    blank[time_cols] |= frame[time_cols].apply(lambda col: col.astype(str).str.strip().eq('-'))
+    # Plain object array; indexing it is a pointer fetch instead of building a Series per row
+    values = frame.where(~blank, '').to_numpy(dtype=object)
+
+    # Find the rows whose cells do not already hold the new values. A blank
+    # cell counts as equal to '' whether it reads back as '' or None (openpyxl
+    # saves '' as an empty cell), and hidden merged cells read as None, so
+    # this is checked before anything is unmerged.
+    last_row = data_start_row + DAILY_ROW_COUNT - 1
+    changed = []
+    current_rows = ws.iter_rows(min_row=data_start_row, max_row=last_row,
+                                max_col=LAST_DAILY_COLUMN, values_only=True)
+    for i, current in enumerate(current_rows):
+        row_values = values[i]
+        differs = any(('' if current[col_num - 1] is None else current[col_num - 1]) != val
+                      for col_num, val in zip(DAILY_COLUMN_NUMBERS, row_values))
+        if not differs and row_values[POPIS_INDEX] != '':
+            differs = any(current[c - 1] not in ('', None) for c in (6, 7, 8))
+        if differs:
+            changed.append(i)
+    if not changed:
+        logger.info("Daily rows already up to date")
+        return
+    changed_rows = {data_start_row + i for i in changed}
+
+    # Collect every merged range overlapping a changed row of the written
+    # block (columns 1..LAST_DAILY_COLUMN) in one pass; merges on unchanged
+    # rows and to the right of the table are left alone
+    block_merges = [merged_range.coord for merged_range in ws.merged_cells.ranges
+                    if merged_range.min_col <= LAST_DAILY_COLUMN
+                    and any(r in changed_rows for r in range(max(merged_range.min_row, data_start_row),
+                                                             min(merged_range.max_row, last_row) + 1))]
     
     try:
-        for i in range(31):
+        # Unmerge them all up front; the writes below then only see real cells
+        logger.debug("Unmerging %d ranges in the daily block", len(block_merges))
+        for coord in block_merges:
+            ws.unmerge_cells(coord)
+
+        for i in changed:
             target_row = data_start_row + i
             
-            # Unmerge cells for this row if needed
-            for merged_range in original_ranges:
-                if merged_range.min_row <= target_row <= merged_range.max_row:
-                    coord = merged_range.coord
-                    if coord not in unmerged_coords:
-                        ws.unmerge_cells(coord)
-                        unmerged_coords.add(coord)
-                        logging.debug(f"Unmerging {coord} for row {target_row}")
-            
-            # Update cells
-            for col_name, col_num in col_mappings.items():
-                val = df_target.iloc[i][col_name]
-                # sanitize time-like fields before writing to Excel
-                if col_name in ('Pocet_Odpracovanych_Hodin', 'Prestavka_Trvanie', 'PH_Projekt_POO', 'PH_Riesenie_POO', 'PH_Mimo_Projekt_POO', 'SPOLU'):
-                    # reuse the sanitizer defined in outer scope by calling a small inline function
-                    def _sanitize_for_write(v):
-                        if v is None or (isinstance(v, float) and pd.isna(v)):
-                            return ''
-                        if isinstance(v, set) and len(v) == 1:
-                            v = next(iter(v))
-                        if isinstance(v, str) and v.strip() == '-':
-                            return ''
-                        return v
-                    val = _sanitize_for_write(val)
-                if pd.isna(val) or val == '-':
-                    val = ''
-                ws.cell(row=target_row, column=col_num, value=val)
-                
-                # Clear merged cells for description if it has content
-                if col_name == 'Popis_Cinnosti' and val != '':
-                    for c in [6, 7, 8]:
-                        ws.cell(row=target_row, column=c, value='')
+            # Update cells through the row's cell tuple, fetched after unmerging
+            # so it holds real cells rather than the merged placeholders
+            row_cells = next(ws.iter_rows(min_row=target_row, max_row=target_row,
+                                          max_col=LAST_DAILY_COLUMN))
+            row_values = values[i]
+            for col_num, val in zip(DAILY_COLUMN_NUMBERS, row_values):
+                # Skip cells that already hold the value (blank == '')
+                cell = row_cells[col_num - 1]
+                if ('' if cell.value is None else cell.value) != val:
+                    cell.value = val
+
+            # Clear merged cells for description if it has content
+            if row_values[POPIS_INDEX] != '':
+                for c in [6, 7, 8]:
+                    if row_cells[c - 1].value not in ('', None):
+                        row_cells[c - 1].value = ''
+        logger.info("Updated %d of %d daily rows", len(changed), DAILY_ROW_COUNT)
         
         # Re-merge cells that were unmerged
-        for coord in unmerged_coords:
+        for coord in block_merges:
             ws.merge_cells(coord)
-        logging.info(f"Re-merged {len(unmerged_coords)} ranges")
+        logger.info("Re-merged %s ranges", len(block_merges))
         
     except Exception as e:
-        logging.error(f"Error during row update: {e}")
+        logger.error("Error during row update: %s", e)
 
 
 def recalculate_summary(df_target: pd.DataFrame, ws):
     """Recalculate and update summary row."""
     # Count work days
     try:
-        work_days = len(df_target[df_target['SPOLU'] != '00:00:00'])
+        work_days = int((df_target['SPOLU'] != '00:00:00').sum())
     except Exception as e:
-        logging.warning(f"Error counting work days: {e}")
+        logger.warning("Error counting work days: %s", e)
         work_days = 0
     
-    # Sum total hours
-    total_td = timedelta()
-    for value in df_target['SPOLU']:
-        if value not in (None, '00:00:00', ''):
-            try:
-                h, m, s = map(int, str(value).split(':'))
-                total_td += timedelta(hours=h, minutes=m, seconds=s)
-            except (ValueError, AttributeError, TypeError) as e:
-                logging.warning(f"Could not parse SPOLU value '{value}': {e}")
+    # Sum total hours in one vectorized pass. A value counts when it is three
+    # ':'-separated integers, each with optional sign and surrounding spaces
+    # (what int() accepts per field, so '8:0:0' and ' 08:00:00' count and
+    # '-1:30:00' is -1h + 30min); anything else is reported and left out
+    spolu = df_target['SPOLU']
+    active = spolu[spolu.notna() & ~spolu.isin(('00:00:00', ''))].astype(str)
+    fields = active.str.extract(r'^\s*([+-]?\d+)\s*:\s*([+-]?\d+)\s*:\s*([+-]?\d+)\s*$')
+    well_formed = fields.notna().all(axis=1)
+    for value in active[~well_formed]:
+        logger.warning("Could not parse SPOLU value %r", value)
+    parts = fields[well_formed].astype('int64')
+    durations = pd.to_timedelta(parts[0] * 3600 + parts[1] * 60 + parts[2], unit='s')
     
     # Format total time
     try:
-        total_seconds = total_td.total_seconds()
-        hours = int(abs(total_seconds) // 3600)
-        minutes = int((abs(total_seconds) % 3600) // 60)
-        seconds = int(abs(total_seconds) % 60)
+        total_seconds = int(abs(durations.sum().total_seconds()))
+        hours, remainder = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
         total_time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
     except Exception as e:
-        logging.warning(f"Error formatting total time: {e}")
+        logger.warning("Error formatting total time: %s", e)
         total_time_str = '00:00:00'
     
     # Update summary cell (typically row 57, column 14)
     try:
         ws.cell(row=57, column=14, value=total_time_str)
-        logging.info(f"Summary updated: {total_time_str} in N57")
+        logger.info("Summary updated: %s in N57", total_time_str)
     except Exception as e:
-        logging.error(f"Error updating summary cell: {e}")
+        logger.error("Error updating summary cell: %s", e)
     
     return f"{work_days} days, {total_time_str}", total_time_str
 
 
-def save_and_validate(wb, df_target: Optional[pd.DataFrame], backup_path: str, output_dir: str, dry_run: bool):
-    """Save workbook and generate output files."""
+def create_backup(target_path: str, dry_run: bool, timestamp: Optional[str] = None) -> Optional[str]:
+    """Copy the target workbook into its backup/ folder before anything else runs.
+
+    The backup is always a real copy, so later writes to the target cannot
+    reach it. If a backup with this timestamp already exists (two runs in
+    the same second), a numeric suffix keeps the name unique.
+
+    Returns the backup path, or None when no backup is made.
+    """
+    if dry_run or not os.path.exists(target_path):
+        return None
+    backup_timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_dir = os.path.join(os.path.dirname(target_path), 'backup')
+    os.makedirs(backup_dir, exist_ok=True)
+    backup_path = os.path.join(backup_dir, f"backup_{backup_timestamp}.xlsx")
+    suffix = 1
+    while os.path.exists(backup_path):
+        backup_path = os.path.join(backup_dir, f"backup_{backup_timestamp}_{suffix}.xlsx")
+        suffix += 1
+    shutil.copy(target_path, backup_path)
+    logger.info("Backup created: %s", backup_path)
+    return backup_path
+
+
+def _write_csv(df: pd.DataFrame, csv_path: str):
+    """Write a small all-text frame with csv.writer; missing values become empty fields."""
+    rows = df.astype(object).where(df.notna(), '').itertuples(index=False, name=None)
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(df.columns)
+        writer.writerows(rows)
+
+
+def save_transformed_csv(df: pd.DataFrame, sheet_name: str, output_dir: str, timestamp: str):
+    """Write one sheet's transformed rows to output_dir/transformed for auditing.
+
+    Failures are logged and swallowed; the CSV is a side output.
+    """
+    try:
+        transformed_dir = os.path.join(output_dir, 'transformed')
+        os.makedirs(transformed_dir, exist_ok=True)
+        safe_name = sheet_name.replace(' ', '_').replace('/', '_')
+        csv_path = os.path.join(transformed_dir, f"transformed_{safe_name}_{timestamp}.csv")
+        _write_csv(df, csv_path)
+        logger.info("Transformed CSV saved to %s", csv_path)
+    except Exception as e:
+        logger.warning("Could not save transformed CSV for %s: %s", sheet_name, e)
+
+
+def _remove_quietly(path: str):
+    """Delete a leftover file if it exists, ignoring errors."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def save_and_validate(wb, df_target: Optional[pd.DataFrame], backup_path: str, output_dir: str, dry_run: bool,
+                      timestamp: Optional[str] = None):
+    """Save workbook and generate output files.
+
+    ``timestamp`` names the output files; pass the run timestamp so they
+    match the backup and transformed CSVs of the same run.
+    """
     os.makedirs(output_dir, exist_ok=True)
     
     # Generate timestamp for output files
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = os.path.join(output_dir, f"updated_{timestamp}.xlsx")
     
     if dry_run:
-        logging.info("Dry run: skipping workbook save")
+        logger.info("Dry run: skipping workbook save")
         wb.close()
         return
 
+    tmp_path = output_path + '.tmp'
     try:
-        wb.save(output_path)
-        logging.info(f"Workbook saved to {output_path}")
+        # Save next to the destination and rename into place, so an interrupted
+        # save never leaves a truncated updated_*.xlsx behind
+        wb.save(tmp_path)
+        os.replace(tmp_path, output_path)
+        logger.info("Workbook saved to %s", output_path)
 
         # Save CSV for audit only if df_target is provided
         if df_target is not None:
@@ -595,22 +681,24 @@ def save_and_validate(wb, df_target: Optional[pd.DataFrame], backup_path: str, o
             transformed_dir = os.path.join(output_dir, 'transformed')
             os.makedirs(transformed_dir, exist_ok=True)
             csv_path = os.path.join(transformed_dir, f"transformed_data_{timestamp}.csv")
-            df_target.to_csv(csv_path, index=False)
-            logging.info(f"Transformed CSV saved to {csv_path}")
+            _write_csv(df_target, csv_path)
+            logger.info("Transformed CSV saved to %s", csv_path)
 
         wb.close()
-        logging.info("Workbook closed successfully")
+        logger.info("Workbook closed successfully")
 
     except PermissionError as e:
-        logging.error(f"Permission error saving workbook: {e}. Please close Excel file and retry.")
+        logger.error("Permission error saving workbook: %s. Please close Excel file and retry.", e)
+        _remove_quietly(tmp_path)
         try:
             wb.close()
         except Exception:
             pass
     except Exception as e:
-        logging.error(f"Error saving workbook: {e}")
+        logger.error("Error saving workbook: %s", e)
+        _remove_quietly(tmp_path)
         if backup_path and os.path.exists(backup_path):
-            logging.info(f"Backup available at: {backup_path}")
+            logger.info("Backup available at: %s", backup_path)
         try:
             wb.close()
         except Exception:
@@ -620,6 +708,7 @@ def save_and_validate(wb, df_target: Optional[pd.DataFrame], backup_path: str, o
 
 def main():
     """Main function to orchestrate the update process."""
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
     args = parse_args()
 
     SLOVAK_MONTHS = {
@@ -646,12 +735,14 @@ def _main_vacations_mode(args, SLOVAK_MONTHS):
     if not month_num:
         raise ValueError(f"Unknown month: '{args.month}'")
 
-    logging.info("Starting vykaz update (vacations-only mode)")
+    logger.info("Starting vykaz update (vacations-only mode)")
+    # One timestamp names every file this run writes (backup, CSVs, output)
+    run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
 
     # Load vacation data
     vac_data = load_vacations(args.vacations_json)
     vacations = vac_data.get("vacations", {})
-    logging.info(f"Loaded vacations for {len(vacations)} employees")
+    logger.info("Loaded vacations for %s employees", len(vacations))
 
     # Load config for protected sheets
     mappings_config = sheet_mapper.load_mappings_config()
@@ -660,35 +751,24 @@ def _main_vacations_mode(args, SLOVAK_MONTHS):
     target_file_to_process = args.target_excel
 
     # Create backup
-    backup_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_dir = os.path.join(os.path.dirname(target_file_to_process), 'backup')
-    os.makedirs(backup_dir, exist_ok=True)
-    backup_path = os.path.join(backup_dir, f"backup_{backup_timestamp}.xlsx")
-
-    if not args.dry_run and os.path.exists(target_file_to_process):
-        shutil.copy(target_file_to_process, backup_path)
-        logging.info(f"Backup created: {backup_path}")
-    else:
-        backup_path = None
+    backup_path = create_backup(target_file_to_process, args.dry_run, run_ts)
 
     # Load target workbook
     wb = load_workbook(target_file_to_process)
-    from src.extractor_utils import STRATEGY_REGISTRY
-    target_strategy = STRATEGY_REGISTRY["target"]
-    data_start_row = target_strategy["start_row_strategy"](None)
+    data_start_row = DATA_START_ROW
 
     processed_sheets = 0
     for sheet_name in wb.sheetnames:
         if sheet_name.strip() in protected_sheets:
-            logging.info(f"Skipping protected sheet: {sheet_name}")
+            logger.info("Skipping protected sheet: %s", sheet_name)
             continue
 
         # Match vacation days for this employee
         vac_days = match_vacation_to_sheet(sheet_name, vacations)
         if vac_days:
-            logging.info(f"Processing {sheet_name} with {len(vac_days)} vacation entries")
+            logger.info("Processing %s with %s vacation entries", sheet_name, len(vac_days))
         else:
-            logging.info(f"Processing {sheet_name} (no vacations)")
+            logger.info("Processing %s (no vacations)", sheet_name)
 
         df = generate_data_with_vacations(
             args.year, month_num, args.activity_text, args.work_location,
@@ -702,38 +782,32 @@ def _main_vacations_mode(args, SLOVAK_MONTHS):
             try:
                 ws['E13'] = args.month
             except Exception as e:
-                logging.warning(f"Could not update month in E13 for {sheet_name}: {e}")
+                logger.warning("Could not update month in E13 for %s: %s", sheet_name, e)
 
         update_daily_rows(ws, df, data_start_row)
         summary_text, _ = recalculate_summary(df, ws)
-        logging.info(f"Summary for {sheet_name}: {summary_text}")
+        logger.info("Summary for %s: %s", sheet_name, summary_text)
 
         # Save transformed CSV
-        try:
-            transformed_dir = os.path.join(args.output_dir, 'transformed')
-            os.makedirs(transformed_dir, exist_ok=True)
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_name = sheet_name.replace(' ', '_').replace('/', '_')
-            csv_path = os.path.join(transformed_dir, f"transformed_{safe_name}_{ts}.csv")
-            df.to_csv(csv_path, index=False)
-            logging.info(f"Transformed CSV saved to {csv_path}")
-        except Exception as e:
-            logging.warning(f"Could not save CSV for {sheet_name}: {e}")
+        if not args.no_transformed_csv:
+            save_transformed_csv(df, sheet_name, args.output_dir, run_ts)
 
         processed_sheets += 1
 
-    logging.info(f"Total sheets processed: {processed_sheets}")
-    save_and_validate(wb, None, backup_path, args.output_dir, args.dry_run)
-    logging.info("Process completed successfully")
+    logger.info("Total sheets processed: %s", processed_sheets)
+    save_and_validate(wb, None, backup_path, args.output_dir, args.dry_run, run_ts)
+    logger.info("Process completed successfully")
 
 
 def _main_source_mode(args, SLOVAK_MONTHS):
     """Original source-based processing mode."""
     try:
-        logging.info("Starting vykaz update process")
+        logger.info("Starting vykaz update process")
+        # One timestamp names every file this run writes (backup, CSVs, output)
+        run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
 
         # Step 1: Create sheet mappings between source and target
-        logging.info("Creating sheet mappings...")
+        logger.info("Creating sheet mappings...")
         source_sheets = sheet_mapper.extract_sheet_names(args.source_excel)
         source_sheets = sheet_mapper.filter_instruction_sheets(source_sheets)
         target_sheets = sheet_mapper.extract_sheet_names(args.target_excel)
@@ -744,120 +818,106 @@ def _main_source_mode(args, SLOVAK_MONTHS):
             raise ValueError(f"Could not extract sheet names from target file: {args.target_excel}")
 
         mapping, unmatched_source, unmatched_target = sheet_mapper.create_mapping(source_sheets, target_sheets)
-        logging.info(f"Created mappings for {len(mapping)} sheets")
+        logger.info("Created mappings for %s sheets", len(mapping))
 
         # Load config for protected sheets
         mappings_config = sheet_mapper.load_mappings_config()
         protected_sheets = mappings_config.get("protected_sheets", [])
 
         if unmatched_source:
-            logging.warning(f"Unmatched source sheets: {unmatched_source}")
+            logger.warning("Unmatched source sheets: %s", unmatched_source)
         if unmatched_target:
-            logging.warning(f"Unmatched target sheets: {unmatched_target}")
+            logger.warning("Unmatched target sheets: %s", unmatched_target)
 
         # Separate unmatched targets into contractors (to fill) and protected (to keep as-is)
         contractor_names, protected_names = sheet_mapper.filter_protected_from_unmatched(
             unmatched_target, protected_sheets
         )
         if contractor_names:
-            logging.info(f"Contractor sheets (will fill with 8h/day): {contractor_names}")
+            logger.info("Contractor sheets (will fill with 8h/day): %s", contractor_names)
         if protected_names:
-            logging.info(f"Protected sheets (kept as-is): {protected_names}")
-
-        # Step 1.5: No sheets are removed — contractors and protected are kept
-        cleaned_target_path = args.target_excel
+            logger.info("Protected sheets (kept as-is): %s", protected_names)
 
-        # Step 1.6: Sort target sheets based on source sheet order
-        target_file_to_process = cleaned_target_path
-        if not args.no_sort_target:
-            logging.info("Sorting target sheets based on source sheet order...")
-            sorted_target_path = sheet_mapper.sort_target_sheets_by_source_order(
-                args.source_excel,
-                cleaned_target_path,
-                mapping,
-                save_sorted=True
-            )
-            if sorted_target_path:
-                logging.info(f"Sorted target workbook saved to: {sorted_target_path}")
-                target_file_to_process = sorted_target_path
-        else:
-            logging.info("Skipping target sorting (disabled by --no-sort-target)")
+        # Step 1.5: No sheets are removed — contractors and protected are kept.
+        # Step 2: Back up the target file as given; a failure stops the run here
+        backup_path = create_backup(args.target_excel, args.dry_run, run_ts)
+        if args.dry_run:
+            logger.info("Dry run: skipping backup creation")
 
-        # Step 2: Create backup of target file
-        backup_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_dir = os.path.join(os.path.dirname(target_file_to_process), 'backup')
-        os.makedirs(backup_dir, exist_ok=True)
-        backup_path = os.path.join(backup_dir, f"backup_{backup_timestamp}.xlsx")
+        # Step 3: Load target workbook once; sorting happens on this instance
+        logger.info("Loading target Excel...")
+        wb = load_workbook(args.target_excel)
 
-        if not args.dry_run and os.path.exists(target_file_to_process):
-            shutil.copy(target_file_to_process, backup_path)
-            logging.info(f"Backup created: {backup_path}")
+        if not args.no_sort_target:
+            logger.info("Sorting target sheets based on source sheet order...")
+            sheet_mapper.order_workbook_sheets(wb, source_sheets, mapping)
         else:
-            backup_path = None
-            if args.dry_run:
-                logging.info("Dry run: skipping backup creation")
-
-        # Step 3: Load target workbook once
-        logging.info("Loading target Excel...")
-        wb = load_workbook(target_file_to_process)
-
-        # Step 4: Process each mapped sheet
-        processed_sheets = 0
+            logger.info("Skipping target sorting (disabled by --no-sort-target)")
+
+        # Step 4: Process each mapped sheet. The source workbook is parsed once,
+        # on the first extraction; later sheets are served from that parse.
+        # Filter the mapping once: drop unmapped sources and keep only the first
+        # source for a target that several source sheets fuzzy-matched onto
+        positive_mappings = {}
+        seen_targets = set()
         for source_sheet, target_sheet in mapping.items():
             if target_sheet == '-':
-                logging.info(f"Skipping unmapped source sheet: {source_sheet}")
+                logger.info("Skipping unmapped source sheet: %s", source_sheet)
+                continue
+            if target_sheet in seen_targets:
+                logger.info("Skipping duplicate-target mapping: %s -> %s", source_sheet, target_sheet)
                 continue
+            positive_mappings[source_sheet] = target_sheet
+            seen_targets.add(target_sheet)
 
-            logging.info(f"Processing sheet mapping: {source_sheet} -> {target_sheet}")
+        processed_sheets = 0
+        for source_sheet, target_sheet in positive_mappings.items():
+            logger.info("Processing sheet mapping: %s -> %s", source_sheet, target_sheet)
 
             try:
                 # Extract source data for this specific sheet
-                logging.info(f"Extracting source data from sheet: {source_sheet}")
+                logger.info("Extracting source data from sheet: %s", source_sheet)
                 df_source = extract_source_data(args.source_excel, source_sheet)
-                logging.info(f"Extracted {len(df_source)} rows from {source_sheet}")
+                logger.info("Extracted %s rows from %s", len(df_source), source_sheet)
 
                 # Transform data
-                logging.info(f"Transforming data for sheet: {target_sheet}")
+                logger.info("Transforming data for sheet: %s", target_sheet)
                 df_target = source_to_target(
                     df_source,
                     args.activity_text,
                     args.work_location
                 )
-                logging.info("Data transformation completed")
+                logger.info("Data transformation completed")
 
                 # Get target worksheet
                 if target_sheet not in wb.sheetnames:
-                    logging.error(f"Target sheet '{target_sheet}' not found in workbook")
+                    logger.error("Target sheet %r not found in workbook", target_sheet)
                     continue
 
                 ws = wb[target_sheet]
 
-                # Find data start row using the target strategy
-                from src.extractor_utils import STRATEGY_REGISTRY
-                target_strategy = STRATEGY_REGISTRY["target"]
-                data_start_row = target_strategy["start_row_strategy"](None)
-                logging.info(f"Using data start row: {data_start_row}")
+                # Data start row comes from the target strategy
+                data_start_row = DATA_START_ROW
+                logger.info("Using data start row: %s", data_start_row)
 
                 # Update month if provided
                 if args.month:
                     try:
                         ws['E13'] = args.month
-                        logging.info(f"Updated cell E13 with month: {args.month}")
+                        logger.info("Updated cell E13 with month: %s", args.month)
                     except Exception as e:
-                        logging.warning(f"Could not update month in E13: {e}")
+                        logger.warning("Could not update month in E13: %s", e)
 
                 # Update daily rows
-                logging.info(f"Updating daily rows in sheet: {target_sheet}")
+                logger.info("Updating daily rows in sheet: %s", target_sheet)
                 update_daily_rows(ws, df_target, data_start_row)
 
                 # Recalculate summary
-                logging.info(f"Recalculating summary for sheet: {target_sheet}")
+                logger.info("Recalculating summary for sheet: %s", target_sheet)
                 summary_text, total_time = recalculate_summary(df_target, ws)
-                logging.info(f"Summary for {target_sheet}: {summary_text}")
+                logger.info("Summary for %s: %s", target_sheet, summary_text)
                 # Save transformed CSV for this sheet into transformed subfolder
-                try:
-                    transformed_dir = os.path.join(args.output_dir, 'transformed')
-                    os.makedirs(transformed_dir, exist_ok=True)
+                if not args.no_transformed_csv:
                     def _normalize_df_times(df):
                         def _fix(v):
                             if v is None or (isinstance(v, float) and pd.isna(v)):
@@ -867,85 +927,69 @@ def _main_source_mode(args, SLOVAK_MONTHS):
                             if isinstance(v, str) and v.strip() == '-':
                                 return ''
                             return v
-                        for c in ['Pocet_Odpracovanych_Hodin','Prestavka_Trvanie','PH_Projekt_POO','PH_Riesenie_POO','PH_Mimo_Projekt_POO','SPOLU']:
+                        for c in TIME_COLUMNS:
                             if c in df.columns:
                                 df[c] = df[c].apply(_fix).astype(str)
                         return df
 
-                    csv_df = _normalize_df_times(df_target.copy())
-                    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    safe_name = target_sheet.replace(' ', '_').replace('/', '_')
-                    csv_path = os.path.join(transformed_dir, f"transformed_{safe_name}_{ts}.csv")
-                    csv_df.to_csv(csv_path, index=False)
-                    logging.info(f"Transformed CSV saved to {csv_path}")
-                except Exception as e:
-                    logging.warning(f"Could not save transformed CSV for {target_sheet}: {e}")
+                    save_transformed_csv(_normalize_df_times(df_target.copy()), target_sheet,
+                                         args.output_dir, run_ts)
 
                 processed_sheets += 1
 
             except Exception as e:
-                logging.error(f"Error processing sheet {source_sheet} -> {target_sheet}: {e}")
+                logger.error("Error processing sheet %s -> %s: %s", source_sheet, target_sheet, e)
                 continue
 
-        logging.info(f"Successfully processed {processed_sheets} employee sheets")
+        logger.info("Successfully processed %s employee sheets", processed_sheets)
 
         # Step 4b: Process contractor sheets (unmatched targets that aren't protected)
         if contractor_names and args.month and args.year:
             month_num = SLOVAK_MONTHS.get(args.month.lower())
             if not month_num:
-                logging.warning(f"Could not resolve month '{args.month}' — skipping contractors")
+                logger.warning("Could not resolve month %r — skipping contractors", args.month)
             else:
-                logging.info(f"Processing {len(contractor_names)} contractor sheets...")
-                from src.extractor_utils import STRATEGY_REGISTRY
-                target_strategy = STRATEGY_REGISTRY["target"]
+                logger.info("Processing %s contractor sheets...", len(contractor_names))
 
                 for contractor_sheet in contractor_names:
                     if contractor_sheet not in wb.sheetnames:
-                        logging.warning(f"Contractor sheet '{contractor_sheet}' not found in workbook, skipping")
+                        logger.warning("Contractor sheet %r not found in workbook, skipping", contractor_sheet)
                         continue
 
-                    logging.info(f"Processing contractor: {contractor_sheet}")
+                    logger.info("Processing contractor: %s", contractor_sheet)
                     df_contractor = generate_contractor_data(
                         args.year, month_num, args.activity_text, args.work_location
                     )
 
                     ws = wb[contractor_sheet]
-                    data_start_row = target_strategy["start_row_strategy"](None)
+                    data_start_row = DATA_START_ROW
 
                     if args.month:
                         try:
                             ws['E13'] = args.month
                         except Exception as e:
-                            logging.warning(f"Could not update month in E13: {e}")
+                            logger.warning("Could not update month in E13: %s", e)
 
                     update_daily_rows(ws, df_contractor, data_start_row)
                     summary_text, _ = recalculate_summary(df_contractor, ws)
-                    logging.info(f"Summary for contractor {contractor_sheet}: {summary_text}")
+                    logger.info("Summary for contractor %s: %s", contractor_sheet, summary_text)
 
-                    try:
-                        transformed_dir = os.path.join(args.output_dir, 'transformed')
-                        os.makedirs(transformed_dir, exist_ok=True)
-                        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        safe_name = contractor_sheet.replace(' ', '_').replace('/', '_')
-                        csv_path = os.path.join(transformed_dir, f"transformed_{safe_name}_{ts}.csv")
-                        df_contractor.to_csv(csv_path, index=False)
-                        logging.info(f"Transformed CSV saved to {csv_path}")
-                    except Exception as e:
-                        logging.warning(f"Could not save CSV for {contractor_sheet}: {e}")
+                    if not args.no_transformed_csv:
+                        save_transformed_csv(df_contractor, contractor_sheet, args.output_dir, run_ts)
 
                     processed_sheets += 1
         elif contractor_names:
-            logging.warning("Skipping contractors: --month and --year are required")
+            logger.warning("Skipping contractors: --month and --year are required")
 
-        logging.info(f"Total sheets processed: {processed_sheets}")
+        logger.info("Total sheets processed: %s", processed_sheets)
 
         # Step 5: Save and validate
-        logging.info("Saving workbook...")
-        save_and_validate(wb, None, backup_path, args.output_dir, args.dry_run)
-        logging.info("Process completed successfully")
+        logger.info("Saving workbook...")
+        save_and_validate(wb, None, backup_path, args.output_dir, args.dry_run, run_ts)
+        logger.info("Process completed successfully")
 
     except Exception as e:
-        logging.error(f"An error occurred: {e}")
+        logger.error("An error occurred: %s", e)
         raise
 
 